@@ -0,0 +1,93 @@
+"""
+Compare the per-row and batch grid extraction paths on a local fixture page.
+
+Usage:
+    python benchmarks/bench_extraction.py --contacts 2000
+
+Runs headless Chromium by default (Selenium Manager fetches the driver), or pass
+--browser edge on Windows.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from selenium import webdriver
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dncmassemailer import contact_grid
+from fixtures import contact_grid_html
+
+
+def start_driver(browser):
+    if browser == "edge":
+        options = webdriver.EdgeOptions()
+        options.add_argument("--headless=new")
+        return webdriver.Edge(options=options)
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=options)
+
+
+def count_commands(driver):
+    """
+    Wrap driver.execute so every WebDriver command sent to the driver process is counted.
+    """
+    counter = {"commands": 0}
+    execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        counter["commands"] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return counter
+
+
+def run(driver, counter, url, extract):
+    driver.get(url)
+    counter["commands"] = 0
+    start = time.perf_counter()
+    contacts = extract(driver)
+    elapsed = time.perf_counter() - start
+    return len(contacts), counter["commands"], elapsed
+
+
+def batch(driver):
+    contacts = contact_grid.extract_rows(driver)
+    contact_grid.select_rows(driver, contacts)
+    return contacts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=2000)
+    parser.add_argument("--browser", choices=["chromium", "edge"], default="chromium")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False) as f:
+        f.write(contact_grid_html(args.contacts))
+    url = "file://" + os.path.abspath(f.name).replace(os.sep, "/")
+
+    driver = start_driver(args.browser)
+    counter = count_commands(driver)
+    try:
+        results = {
+            "per-row": run(driver, counter, url, contact_grid.extract_and_select_per_row),
+            "batch": run(driver, counter, url, batch),
+        }
+    finally:
+        driver.quit()
+        os.remove(f.name)
+
+    print(f"{'path':<8} {'contacts':>9} {'commands':>9} {'seconds':>9} {'contacts/s':>11}")
+    for name, (contacts, commands, elapsed) in results.items():
+        print(f"{name:<8} {contacts:>9} {commands:>9} {elapsed:>9.2f} {contacts / elapsed:>11.0f}")
+    speedup = results["per-row"][2] / results["batch"][2]
+    print(f"\nbatch is {speedup:.1f}x faster than per-row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Compare the default and lean browser profiles on the fake PhoneBurner pages:
+time until the contact grid is ready and peak memory of the whole browser.
+
+Usage:
+    python benchmarks/bench_profile.py --contacts 1000 --assets 40 --loads 10
+
+Each profile logs in, then opens the folder page --loads times from scratch (the
+contact manager page with --assets images, a font and a video, then the grid). The
+default profile runs headless too, so the difference is only the lean settings.
+Peak RSS is the highest sum, sampled every 50 ms, over the driver process and every
+browser process it started.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fake_phoneburner
+from dncmassemailer import browser, contact_grid, waits
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _tree_rss_proc(root_pid):
+    """
+    RSS in bytes of a process and all of its descendants, from /proc (Linux).
+    """
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, the fields after it do not
+                ppid = int(f.read().rpartition(")")[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, pending = 0, [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+
+def tree_rss(root_pid):
+    if psutil:
+        try:
+            root = psutil.Process(root_pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return 0
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return total
+    if os.path.isdir("/proc"):
+        return _tree_rss_proc(root_pid)
+    raise SystemExit("Install psutil to measure memory on this platform")
+
+
+class PeakSampler:
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_profile(browser_name, lean, base_url, loads):
+    """
+    Return (time-to-grid samples in seconds, peak RSS in bytes, contacts on the page).
+    """
+    driver = browser.start_browser(browser_name, None, headless=True, lean=lean)
+    try:
+        with PeakSampler(driver.service.process.pid) as sampler:
+            browser.login(driver, base_url, "bench@example.com", "bench")
+            url = contact_grid.folder_page_url(base_url, "2766255", 1)
+            samples = []
+            for _ in range(loads):
+                driver.get("about:blank")
+                start = time.perf_counter()
+                driver.get(url)
+                waits.wait_for(driver, "grid", lambda d: d.execute_script(contact_grid.GRID_REPLACED_JS) and waits.page_idle(d))
+                samples.append(time.perf_counter() - start)
+            contacts = len(contact_grid.extract_rows(driver))
+        return samples, sampler.peak, contacts
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=1000, help="contacts on the grid page (default: 1000)")
+    parser.add_argument("--assets", type=int, default=40, help="images on the contact page (default: 40)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every server response")
+    parser.add_argument("--loads", type=int, default=10, help="folder page loads per profile (default: 10)")
+    parser.add_argument("--browser", choices=["chromium", "edge"], default="chromium")
+    args = parser.parse_args()
+
+    server = fake_phoneburner.serve(args.contacts, page_size=args.contacts, latency=args.latency, assets=args.assets)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    results = {}
+    try:
+        for name, lean in (("default", False), ("lean", True)):
+            results[name] = run_profile(args.browser, lean, base_url, args.loads)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'profile':<8} {'contacts':>9} {'median s':>9} {'max s':>7} {'peak RSS MiB':>13}")
+    for name, (samples, peak, contacts) in results.items():
+        print(f"{name:<8} {contacts:>9} {statistics.median(samples):>9.3f} {max(samples):>7.3f} {peak / 2**20:>13.0f}")
+    default, lean = results["default"], results["lean"]
+    print(f"\nlean: {statistics.median(default[0]) / statistics.median(lean[0]):.1f}x faster to grid, "
+          f"{100 * (1 - lean[1] / default[1]):.0f}% less peak memory")
+
+
+if __name__ == "__main__":
+    main()
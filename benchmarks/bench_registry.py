@@ -0,0 +1,103 @@
+"""
+Build time, size, lookup rate and resident memory of the DNC registry index.
+
+Usage:
+    python benchmarks/bench_registry.py --numbers 50000000 --queries 2000000
+
+Writes a synthetic registry of --numbers random phone numbers in the FTC's
+"area code,number" layout, builds the index from it and looks up --queries numbers
+(half of them in the registry) as one batch with numpy and, on a sample, one at a
+time as the pure Python fallback does. Resident memory (Linux) is measured before
+opening the index, after looking up a page of 100 numbers and after the full batch,
+to show the index is paged in as lookups touch it rather than loaded; random numbers
+spread over the whole index, so a large batch ends up touching nearly all of it.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dncmassemailer import dnc_registry
+
+
+def rss():
+    """
+    Resident memory of this process in bytes, or None off Linux.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_registry(path, numbers, seed):
+    """
+    Write numbers random phone numbers to path and return a sample of them.
+    """
+    numpy = dnc_registry._numpy()
+    generator = numpy.random.default_rng(seed)
+    sample = []
+    with open(path, "w") as f:
+        f.write("AreaCode,PhoneNumber\n")
+        for start in range(0, numbers, 10 ** 6):
+            batch = generator.integers(2 * 10 ** 9, 10 ** 10, min(10 ** 6, numbers - start))
+            f.write("".join(f"{number // 10 ** 7},{number % 10 ** 7:07}\n" for number in batch.tolist()))
+            sample.extend(batch[:1000].tolist())
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--numbers", type=int, default=10 ** 7, help="numbers in the registry (default: 10000000)")
+    parser.add_argument("--queries", type=int, default=10 ** 6, help="numbers to look up (default: 1000000)")
+    parser.add_argument("--scalar-queries", type=int, default=10 ** 5,
+                        help="numbers to look up one at a time (default: 100000)")
+    args = parser.parse_args()
+    numpy = dnc_registry._numpy()
+    if numpy is None:
+        raise SystemExit("The benchmark needs numpy: pip install numpy")
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "registry.txt")
+        index = os.path.join(directory, "registry.idx")
+        sample = write_registry(source, args.numbers, 1)
+        random.seed(2)
+        queries = [random.choice(sample) if i % 2 else random.randrange(2 * 10 ** 9, 10 ** 10)
+                   for i in range(args.queries)]
+        batch = numpy.array(queries, dtype=numpy.int64)
+
+        start = time.perf_counter()
+        count = dnc_registry.build([source], index)
+        build_seconds = time.perf_counter() - start
+        size = os.path.getsize(index)
+
+        before = rss()
+        registry = dnc_registry.Registry(index)
+        registry.lookup(batch[:100])
+        page = rss()
+        start = time.perf_counter()
+        hits = sum(registry.lookup(batch))
+        batch_seconds = time.perf_counter() - start
+        after = rss()
+        start = time.perf_counter()
+        scalar_hits = sum(number in registry for number in queries[:args.scalar_queries])
+        scalar_seconds = time.perf_counter() - start
+        registry.close()
+
+    print(f"\nregistry   {count:,} unique numbers")
+    print(f"build      {build_seconds:.1f}s ({count / build_seconds:,.0f} numbers/s)")
+    print(f"index      {size / 2**20:.1f} MiB ({size / max(count, 1):.2f} bytes per number)")
+    print(f"batch      {args.queries / batch_seconds:,.0f} lookups/s ({hits:,} of {args.queries:,} found)")
+    print(f"one by one {args.scalar_queries / scalar_seconds:,.0f} lookups/s "
+          f"({scalar_hits:,} of {args.scalar_queries:,} found)")
+    if before is not None:
+        print(f"resident   +{(page - before) / 2**20:.1f} MiB after opening the index and looking up a page of 100, "
+              f"+{(after - before) / 2**20:.1f} MiB after the batch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+How long the tool takes to start, and how much of that the deferred imports save.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+
+Measures, as the median of --runs fresh interpreters:
+  imports   `python -X importtime` of the command line module on its own (what
+            --help, --index-report or --stop-daemon load) against the same module
+            plus everything it used to import up front: Selenium, the browser
+            helpers, requests, the driver cache and the delivery backends
+  commands  wall time of `python -m dncmassemailer --help` and of --index-report on
+            an empty index
+and lists the modules that cost the most in the eager case.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY = "import dncmassemailer.cli"
+EAGER = ("import dncmassemailer.cli, dncmassemailer.browser, dncmassemailer.phoneburner_api, "
+         "dncmassemailer.driver_cache, dncmassemailer.delivery, dncmassemailer.state_index, requests")
+
+
+def _importtime(statement):
+    """
+    Parse `python -X importtime` of statement into (top-level {module: cumulative us},
+    {module: self us}).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    top_level, modules = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that imported them
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative_us)
+        modules[name.strip()] = int(self_us)
+    return top_level, modules
+
+
+def import_times(statement, startup):
+    """
+    Return (microseconds spent importing statement's modules, {module: self us}) for
+    one fresh interpreter, leaving out what the interpreter imports at startup (site).
+    """
+    top_level, modules = _importtime(statement)
+    return sum(us for name, us in top_level.items() if name not in startup), modules
+
+
+def wall_time(arguments):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "dncmassemailer"] + arguments, cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per measurement (default: 10)")
+    parser.add_argument("--top", type=int, default=10, help="costliest eager modules to list (default: 10)")
+    args = parser.parse_args()
+
+    startup = set(_importtime("pass")[0])
+    lazy = [import_times(LAZY, startup) for _ in range(args.runs)]
+    eager = [import_times(EAGER, startup) for _ in range(args.runs)]
+    lazy_ms = statistics.median(total for total, _ in lazy) / 1000
+    eager_ms = statistics.median(total for total, _ in eager) / 1000
+    print(f"\n{'imports':<10} {'median ms':>10}")
+    print(f"{'eager':<10} {eager_ms:>10.1f}")
+    print(f"{'lazy':<10} {lazy_ms:>10.1f}")
+    print(f"saved {eager_ms - lazy_ms:.1f} ms ({100 * (1 - lazy_ms / eager_ms):.0f}%) before any work starts")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = os.path.join(directory, "state.sqlite")
+        commands = {"--help": ["--help"], "--index-report": ["--index-report", "bench@example.com", "--index", index]}
+        print(f"\n{'command':<16} {'median s':>9}")
+        for name, arguments in commands.items():
+            print(f"{name:<16} {statistics.median(wall_time(arguments) for _ in range(args.runs)):>9.3f}")
+
+    # Median self time of each module over the eager runs
+    names = set().union(*(modules for _, modules in eager))
+    costs = {name: statistics.median(modules.get(name, 0) for _, modules in eager) for name in names}
+    lazy_names = set().union(*(modules for _, modules in lazy))
+    print(f"\n{'module (eager, not loaded lazily)':<50} {'self ms':>8}")
+    for name, us in sorted(((name, us) for name, us in costs.items() if name not in lazy_names),
+                           key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<50} {us / 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
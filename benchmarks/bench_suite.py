@@ -0,0 +1,122 @@
+"""
+Throughput and command counts of the extraction, selection and move paths against
+the fake PhoneBurner server, so changes can be measured without the live account.
+
+Usage:
+    python benchmarks/bench_suite.py --contacts 100,1000,10000 --latency 0.02
+    python benchmarks/bench_suite.py --contacts 50000 --page-size 50000 --paths extract,select
+    python benchmarks/bench_suite.py --paths api
+
+For every contact count a fresh server is started with that many contacts in
+Campaign A. The browser paths log in with headless Chromium (or --browser edge):
+  extract  batch read of one grid page
+  per-row  the original row-by-row read-and-tick loop (pages of up to --per-row-max)
+  select   ticking every contact on one grid page by ID
+  move     browser.process_folder over the whole folder: read, tick and move to DNC
+  api      phoneburner_api.process_folder over the whole folder, no browser
+The move and api paths count the contacts the server actually moved.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dncmassemailer import browser, contact_grid, phoneburner_api
+import fake_phoneburner
+from bench_extraction import count_commands, start_driver
+
+FOLDER = "folder_2766255"
+DNC_FOLDER = "folder_2766300"
+PATHS = ["extract", "per-row", "select", "move", "api"]
+
+
+def first_page(driver, base_url):
+    contact_grid.open_folder_page(driver, contact_grid.folder_page_url(base_url, phoneburner_api.folder_view_id(FOLDER), 1))
+
+
+def run_browser_path(path, driver, counter, base_url, per_row_max):
+    """
+    Run one browser path and return (contacts, commands, seconds), or None if skipped.
+    """
+    first_page(driver, base_url)
+    counter["commands"] = 0
+    start = time.perf_counter()
+    if path == "extract":
+        contacts = len(contact_grid.extract_rows(driver))
+    elif path == "per-row":
+        rows = contact_grid.extract_rows(driver)
+        if len(rows) > per_row_max:
+            return None
+        counter["commands"] = 0
+        start = time.perf_counter()
+        contacts = len(contact_grid.extract_and_select_per_row(driver))
+    elif path == "select":
+        ids = [row['id'] for row in contact_grid.extract_rows(driver)]
+        counter["commands"] = 0
+        start = time.perf_counter()
+        contacts = len(ids) - len(contact_grid.select_ids(driver, ids))
+    else:
+        contacts, _ = browser.process_folder(driver, base_url, FOLDER)
+    return contacts, counter["commands"], time.perf_counter() - start
+
+
+def run_api(base_url, server):
+    client = phoneburner_api.PhoneBurnerClient(base_url)
+    client.login("bench@example.com", "bench")
+    before = server.state.requests
+    start = time.perf_counter()
+    contacts, _ = phoneburner_api.process_folder(client, FOLDER, DNC_FOLDER)
+    return contacts, server.state.requests - before, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", default="100,1000,10000", help="comma-separated contact counts (default: 100,1000,10000)")
+    parser.add_argument("--page-size", type=int, default=100, help="contacts per grid page (default: 100)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every server response")
+    parser.add_argument("--move-latency", type=float, default=0.0, help="extra seconds added to every move")
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"comma-separated paths to run (default: {','.join(PATHS)})")
+    parser.add_argument("--per-row-max", type=int, default=2000, help="skip per-row on pages with more contacts than this")
+    parser.add_argument("--browser", choices=["chromium", "edge"], default="chromium")
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(",")]
+    unknown = set(paths) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown paths: {', '.join(sorted(unknown))}")
+
+    results = []
+    for total in (int(n) for n in args.contacts.split(",")):
+        for path in paths:
+            # Every path gets a fresh folder, since the move paths empty it
+            server = fake_phoneburner.serve(total, args.page_size, args.latency, args.move_latency)
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                if path == "api":
+                    result = run_api(base_url, server)
+                else:
+                    driver = start_driver(args.browser)
+                    counter = count_commands(driver)
+                    try:
+                        browser.login(driver, base_url, "bench@example.com", "bench")
+                        result = run_browser_path(path, driver, counter, base_url, args.per_row_max)
+                    finally:
+                        driver.quit()
+            finally:
+                server.shutdown()
+                server.server_close()
+            if result:
+                if path in ("move", "api"):
+                    # Count what actually left the folder, not what was read
+                    result = (server.state.moved,) + result[1:]
+                results.append((total, path) + result)
+
+    print(f"\n{'folder':>7} {'path':<8} {'contacts':>9} {'commands':>9} {'seconds':>9} {'contacts/s':>11}")
+    for total, path, contacts, commands, seconds in results:
+        print(f"{total:>7} {path:<8} {contacts:>9} {commands:>9} {seconds:>9.2f} {contacts / seconds if seconds else 0:>11.0f}")
+    print("\ncommands are WebDriver commands for the browser paths and HTTP requests for api")
+
+
+if __name__ == "__main__":
+    main()
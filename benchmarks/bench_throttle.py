@@ -0,0 +1,105 @@
+"""
+Show the adaptive in-flight limit finding a throttling server's capacity.
+
+Usage:
+    python benchmarks/bench_throttle.py --capacity 4 --threads 16 --pages 400
+
+Starts the fake PhoneBurner with a capacity (grid requests beyond that many at once
+get 429 with a Retry-After) and has --threads API workers read --pages grid pages
+between them, twice:
+  fixed     every thread sends whenever it likes, only honouring Retry-After
+  adaptive  the threads share an AIMD limiter, as a real run's workers do
+and prints pages read per second, pages still throttled after every retry, how many
+requests the server throttled and, for the adaptive run, how the in-flight limit moved.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fake_phoneburner
+from dncmassemailer import phoneburner_api, rate_control
+
+
+def run(limiter, args):
+    """
+    Return (seconds, pages that failed, requests sent, requests throttled,
+    [(seconds, limit)] samples).
+    """
+    server = fake_phoneburner.serve(args.pages, page_size=1, latency=args.latency, capacity=args.capacity,
+                                    retry_after=args.retry_after, error_rate=args.error_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        client = phoneburner_api.PhoneBurnerClient(base_url, pool_size=args.threads)
+        client.login("bench@example.com", "bench")
+        client.limiter = limiter
+        pages = iter(range(1, args.pages + 1))
+        pages_lock = threading.Lock()
+        failed = []
+
+        def worker():
+            while True:
+                with pages_lock:
+                    page = next(pages, None)
+                if page is None:
+                    return
+                try:
+                    client.fetch_contacts("folder_2766255", page)
+                except requests.HTTPError:
+                    # Still throttled after every retry
+                    failed.append(page)
+
+        samples = []
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.05):
+                samples.append((time.perf_counter() - start, limiter.limit))
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        done.set()
+        return seconds, len(failed), server.state.requests, server.state.throttled, samples
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=4, help="requests the server serves at once (default: 4)")
+    parser.add_argument("--threads", type=int, default=16, help="API worker threads (default: 16)")
+    parser.add_argument("--pages", type=int, default=400, help="grid pages to read (default: 400)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per server response (default: 0.05)")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds of a 429 (default: 0.5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    args = parser.parse_args()
+
+    fixed = rate_control.AdaptiveLimiter("fixed", initial=args.threads, minimum=args.threads, maximum=args.threads)
+    adaptive = rate_control.AdaptiveLimiter("adaptive", maximum=args.threads)
+    results = {"fixed": run(fixed, args), "adaptive": run(adaptive, args)}
+
+    print(f"\n{'run':<9} {'seconds':>8} {'pages/s':>8} {'failed':>7} {'requests':>9} {'throttled':>10}")
+    for name, (seconds, failed, sent, throttled, _) in results.items():
+        print(f"{name:<9} {seconds:>8.2f} {(args.pages - failed) / seconds:>8.1f} {failed:>7} {sent:>9} {throttled:>10}")
+
+    samples = results["adaptive"][4]
+    print(f"\nAdaptive in-flight limit (server capacity {args.capacity}):")
+    step = max(1, len(samples) // 20)
+    for at, limit in samples[::step]:
+        print(f"{at:>6.2f}s {limit:>5.1f} {'#' * round(limit)}")
+    adaptive.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+A local, stateful imitation of the parts of PhoneBurner the tool drives, for
+benchmarks and regression runs without the live account.
+
+It serves:
+  /homepage/login  the login form (f_username, f_password, the btn-lg submit button);
+                   any email and password log in
+  /cm/index        the contacts-folder-nav-item sidebar, the cm_move_button and
+                   cm_move_dropdown, the main_contact_grid (filled from the
+                   #params/... hash like the real app) and the confirmation modal with
+                   its "confirm" input and Okay button
+  /cm/grid         one page of a folder's tr.contact-new rows
+  /cm/move         moves contacts between folders, for the page and the API client
+  /assets/...      images, a video and web fonts the contact page references when
+                   started with assets, like the real app's logos, avatars and icon fonts
+
+Moves really take the contacts out of their folder, so a whole run (browser or
+--mode api) can be replayed against it. Every response can be delayed to imitate
+network and server latency, and the server can throttle like a loaded PhoneBurner:
+with a capacity, grid and move requests beyond that many at once are answered
+429 with a Retry-After, and an error rate answers that share of them 503.
+
+Usage:
+    python benchmarks/fake_phoneburner.py --contacts 5000 --latency 0.05
+    python benchmarks/fake_phoneburner.py --capacity 4 --error-rate 0.01
+    python windowsDNCfinder.py --base-url http://127.0.0.1:8765 --folders "Campaign A"
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fixtures import contact_rows_html
+
+SESSION_COOKIE = "PHPSESSID=fake-phoneburner"
+
+LOGIN_HTML = """<!DOCTYPE html><html><head><title>Log In</title></head><body>
+<form action="/homepage/login" method="post">
+<input type="hidden" name="csrf_token" value="fake">
+<input id="f_username" name="username" type="email">
+<input id="f_password" name="password" type="password">
+<button class="btn btn-primary btn-lg w-100" type="submit">Log In</button>
+</form></body></html>"""
+
+INDEX_HTML = """<!DOCTYPE html><html><head><title>Contacts</title>
+<style>.hidden {{ display: none; }}{fonts}</style></head><body>
+{assets}
+<ul class="contacts-folder-nav">{sidebar}</ul>
+<button id="cm_move_button" type="button">Move</button>
+<ul id="cm_move_dropdown" class="hidden">{move_options}</ul>
+<div id="grid_loading" class="loading hidden">Loading...</div>
+<table id="main_contact_grid"><tbody></tbody></table>
+<div id="move_modal" class="modal hidden">
+  <p>Move the selected contacts?</p>
+  <button id="move_modal_continue" class="btn btn-primary" type="button">Continue</button>
+  <div id="move_confirm" class="hidden">
+    <div class="input-group"><input class="form-control" type="text"></div>
+    <button id="move_okay" type="button" disabled>Okay</button>
+  </div>
+</div>
+<script>
+var grid = document.querySelector('#main_contact_grid tbody');
+var loading = document.getElementById('grid_loading');
+var modal = document.getElementById('move_modal');
+var confirmBox = document.getElementById('move_confirm');
+var confirmInput = confirmBox.querySelector('input');
+var okay = document.getElementById('move_okay');
+var dropdown = document.getElementById('cm_move_dropdown');
+var target = null;
+
+function show(el, visible) {{ el.classList.toggle('hidden', !visible); }}
+
+function request(method, url, body, done) {{
+    var xhr = new XMLHttpRequest();
+    xhr.open(method, url);
+    if (body) {{ xhr.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded'); }}
+    xhr.onload = function () {{ done(xhr.responseText); }};
+    xhr.send(body);
+}}
+
+function loadGrid() {{
+    var match = location.hash.match(/^#params\\/(.+)$/);
+    if (!match) {{ grid.innerHTML = ''; return; }}
+    show(loading, true);
+    request('GET', '/cm/grid?' + atob(match[1]), null, function (html) {{
+        var doc = new DOMParser().parseFromString(html, 'text/html');
+        var rows = doc.querySelector('#main_contact_grid tbody');
+        grid.innerHTML = rows ? rows.innerHTML : '';
+        show(loading, false);
+    }});
+}}
+
+function selectedIds() {{
+    var boxes = grid.querySelectorAll("input[type='checkbox']:checked");
+    var ids = [];
+    for (var i = 0; i < boxes.length; i++) {{ ids.push(boxes[i].value); }}
+    return ids;
+}}
+
+function move() {{
+    var body = 'folder_id=' + target;
+    var ids = selectedIds();
+    for (var i = 0; i < ids.length; i++) {{ body += '&contact_ids%5B%5D=' + ids[i]; }}
+    show(modal, false);
+    modal.classList.remove('show');
+    show(loading, true);
+    request('POST', '/cm/move', body, loadGrid);
+}}
+
+document.getElementById('cm_move_button').addEventListener('click', function () {{ show(dropdown, true); }});
+var links = dropdown.querySelectorAll('a');
+for (var i = 0; i < links.length; i++) {{
+    links[i].addEventListener('click', function (event) {{
+        event.preventDefault();
+        show(dropdown, false);
+        target = this.getAttribute('data-folder');
+        if (selectedIds().length > 1) {{
+            show(confirmBox, false);
+            confirmInput.value = '';
+            okay.disabled = true;
+            show(modal, true);
+            modal.classList.add('show');
+        }} else {{
+            move();
+        }}
+    }});
+}}
+document.getElementById('move_modal_continue').addEventListener('click', function () {{ show(confirmBox, true); }});
+confirmInput.addEventListener('input', function () {{ okay.disabled = confirmInput.value !== 'confirm'; }});
+okay.addEventListener('click', move);
+window.addEventListener('hashchange', loadGrid);
+loadGrid();
+</script></body></html>"""
+
+
+ASSET_SIZE = 256 * 1024
+ASSET_TYPES = {".png": "image/png", ".woff2": "font/woff2", ".mp4": "video/mp4"}
+
+
+def assets_html(count):
+    """
+    Markup that makes the browser fetch count images, plus a web font and a video.
+    """
+    if not count:
+        return "", ""
+    fonts = "@font-face { font-family: Icons; src: url(/assets/icons.woff2); } body { font-family: Icons; }"
+    tags = "".join(f'<img src="/assets/avatar{i}.png" width="32" height="32">' for i in range(count))
+    return fonts, tags + '<video src="/assets/intro.mp4" preload="auto" muted></video>'
+
+
+class FakeState:
+    """
+    Folders as ordered lists of contact IDs. The first folder starts with every
+    contact; the others start empty.
+    """
+    def __init__(self, contacts, page_size=100, folders=(("Campaign A", 2766255), ("Campaign B", 2766256), ("DNC", 2766300))):
+        self.page_size = page_size
+        self.names = {view_id: name for name, view_id in folders}
+        self.folders = {view_id: [] for _, view_id in folders}
+        self.folders[folders[0][1]] = list(range(100000, 100000 + contacts))
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.moved = 0
+        self.in_flight = 0
+        self.throttled = 0
+
+    def page(self, view_id, page):
+        with self.lock:
+            contacts = self.folders.get(view_id, [])
+            start = (page - 1) * self.page_size
+            return contacts[start:start + self.page_size]
+
+    def move(self, contact_ids, target):
+        wanted = set(contact_ids)
+        with self.lock:
+            for view_id, contacts in self.folders.items():
+                if view_id != target:
+                    moving = [contact_id for contact_id in contacts if contact_id in wanted]
+                    if moving:
+                        self.folders[view_id] = [contact_id for contact_id in contacts if contact_id not in wanted]
+                        self.folders[target].extend(moving)
+                        self.moved += len(moving)
+
+    def sidebar(self):
+        with self.lock:
+            return "".join(
+                f'<li class="contacts-folder-nav-item" id="folder_{view_id}"><span class="contacts-folder-nav-name">{self.names[view_id]}</span>'
+                f'<span class="contacts-folder-nav-count">{len(contacts)}</span></li>'
+                for view_id, contacts in self.folders.items())
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    state = None
+    latency = 0.0
+    move_latency = 0.0
+    assets = 0
+    capacity = 0
+    retry_after = 1.0
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/html", headers=()):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _logged_in(self):
+        return SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8")) if length else {}
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.in_flight += 1
+            busy = self.state.in_flight
+        try:
+            self._route(url, query, form, busy)
+        finally:
+            with self.state.lock:
+                self.state.in_flight -= 1
+
+    def _throttle(self, busy):
+        """
+        Answer 429 or 503 like an overloaded server would, and say whether it did.
+        """
+        if self.capacity and busy > self.capacity:
+            status, headers = 429, [("Retry-After", f"{self.retry_after:g}")]
+        elif self.error_rate and random.random() < self.error_rate:
+            status, headers = 503, []
+        else:
+            return False
+        with self.state.lock:
+            self.state.throttled += 1
+        self._send(status, "Too many requests" if status == 429 else "Service unavailable", headers=headers)
+        return True
+
+    def _route(self, url, query, form, busy):
+        time.sleep(self.latency)
+
+        if url.path == "/homepage/login":
+            if self.command == "POST":
+                self._send(302, headers=[("Location", "/cm/index"), ("Set-Cookie", SESSION_COOKIE + "; Path=/")])
+            else:
+                self._send(200, LOGIN_HTML)
+        elif not self._logged_in():
+            self._send(302, headers=[("Location", "/homepage/login")])
+        elif url.path.startswith("/assets/"):
+            content_type = ASSET_TYPES.get(os.path.splitext(url.path)[1], "application/octet-stream")
+            self._send(200, os.urandom(ASSET_SIZE), content_type, [("Cache-Control", "no-store")])
+        elif url.path == "/cm/index":
+            move_options = "".join(f'<li><a href="#" data-folder="{view_id}">{name}</a></li>' for view_id, name in self.state.names.items())
+            fonts, assets = assets_html(self.assets)
+            self._send(200, INDEX_HTML.format(sidebar=self.state.sidebar(), move_options=move_options, fonts=fonts, assets=assets))
+        elif url.path in ("/cm/grid", "/cm/move") and self._throttle(busy):
+            pass
+        elif url.path == "/cm/grid":
+            page = self.state.page(int(query.get("view_id", ["0"])[0]), int(query.get("page", ["1"])[0]))
+            self._send(200, '<!DOCTYPE html><html><body><table id="main_contact_grid"><tbody>'
+                            + contact_rows_html(page) + "</tbody></table></body></html>")
+        elif url.path == "/cm/move" and self.command == "POST":
+            time.sleep(self.move_latency)
+            ids = [int(contact_id) for contact_id in form.get("contact_ids[]", [])]
+            self.state.move(ids, int(form.get("folder_id", ["0"])[0]))
+            self._send(200, json.dumps({"success": True, "moved": len(ids)}), "application/json")
+        else:
+            self._send(404, "Not found")
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+def serve(contacts=1000, page_size=100, latency=0.0, move_latency=0.0, port=0, assets=0, capacity=0, retry_after=1.0,
+          error_rate=0.0):
+    """
+    Start the fake server on a background thread and return it. The bound port is
+    server.server_address[1] and the folders are in server.state.
+    """
+    state = FakeState(contacts, page_size)
+    handler = type("Handler", (FakeHandler,), {"state": state, "latency": latency, "move_latency": move_latency, "assets": assets,
+                                               "capacity": capacity, "retry_after": retry_after, "error_rate": error_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--contacts", type=int, default=1000, help="contacts in Campaign A")
+    parser.add_argument("--page-size", type=int, default=100, help="contacts per grid page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--move-latency", type=float, default=0.0, help="extra seconds added to every move")
+    parser.add_argument("--assets", type=int, default=0, help="images the contact page loads, plus a font and a video")
+    parser.add_argument("--capacity", type=int, default=0, help="grid/move requests served at once; more get 429 (default: no limit)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429 (default: 1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of grid/move requests answered 503")
+    args = parser.parse_args()
+
+    server = serve(args.contacts, args.page_size, args.latency, args.move_latency, args.port, args.assets,
+                   args.capacity, args.retry_after, args.error_rate)
+    print(f"Fake PhoneBurner with {args.contacts} contacts on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Static HTML fixtures that mimic the parts of PhoneBurner the scraper touches.
+"""
+
+
+def contact_rows_html(contact_ids):
+    """
+    The tr.contact-new row pairs for the given contact IDs, numbered from 100000 as
+    in contact_grid_html. Each contact is a pair of rows like the real grid; only the
+    first row of the pair holds the mailto link, the checkbox and the name, company,
+    renewal date and phone cells.
+    """
+    rows = []
+    for contact_id in contact_ids:
+        i = contact_id - 100000
+        rows.append(
+            f'<tr class="contact-new" data-contact-id="{contact_id}">'
+            f'<td><input type="checkbox" value="{contact_id}"></td>'
+            f'<td class="contact-name"><a href="#contact/{contact_id}">Contact {i}</a></td>'
+            f'<td class="contact-company">Company {i} Trucking LLC</td>'
+            f'<td class="contact-renewal-date">{i % 12 + 1:02}/{i % 28 + 1:02}/2026</td>'
+            f'<td class="contact-phone">(555) {i // 10000 % 1000:03}-{i % 10000:04}</td>'
+            f'<td><a href="mailto:contact{i}@example.com">contact{i}@example.com</a></td>'
+            f'</tr>'
+            f'<tr class="contact-new"><td colspan="6">Notes for contact {i}</td></tr>'
+        )
+    return "".join(rows)
+
+
+def contact_grid_html(contacts):
+    """
+    A page holding a main_contact_grid with the given number of contacts.
+    """
+    return (
+        "<!DOCTYPE html><html><head><title>Contacts</title></head><body>"
+        '<table id="main_contact_grid"><tbody>'
+        + contact_rows_html(range(100000, 100000 + contacts))
+        + "</tbody></table></body></html>"
+    )
@@ -0,0 +1,100 @@
+"""
+Local stand-in for PhoneBurner that replays recorded HTTP responses.
+
+Each recording is a JSON file with method, path, optional query, status,
+content_type, optional headers (a list value is sent as one header per item) and
+body, as written by PhoneBurnerClient(record_dir=...). Requests are matched on
+method and path, and on the query string too when the recording has one. When
+several recordings match a request they are served in recorded order, the last one
+again once all have been served, so a page read again after a move gets the page as
+it was after the move.
+
+Usage:
+    python benchmarks/replay_server.py --port 8765 --recordings benchmarks/recordings
+    python windowsDNCfinder.py --mode api --base-url http://127.0.0.1:8765
+"""
+import argparse
+import glob
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def load_recordings(directory):
+    recordings = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            recording = json.load(f)
+        key = (recording["method"].upper(), recording["path"])
+        recordings.setdefault(key, []).append(recording)
+    return recordings
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    recordings = {}
+    served = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _replay(self):
+        path, _, query = self.path.partition("?")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        candidates = self.recordings.get((self.command, path), [])
+        matches = [r for r in candidates if r.get("query") and r["query"] == query]
+        if not matches:
+            matches = [r for r in candidates if not r.get("query")]
+        if not matches:
+            self.send_error(404, f"No recording for {self.command} {self.path}")
+            return
+        with self.lock:
+            key = (self.command, path, query)
+            count = self.served[key] = self.served.get(key, 0) + 1
+        match = matches[min(count, len(matches)) - 1]
+
+        body = match.get("body", "").encode("utf-8")
+        self.send_response(match.get("status", 200))
+        self.send_header("Content-Type", match.get("content_type", "text/html"))
+        for name, values in match.get("headers", {}).items():
+            for value in values if isinstance(values, list) else [values]:
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _replay
+    do_POST = _replay
+
+
+def serve(recordings_dir, port=0):
+    """
+    Start the replay server on a background thread and return it.
+    The bound port is server.server_address[1].
+    """
+    handler = type("Handler", (ReplayHandler,), {"recordings": load_recordings(recordings_dir), "served": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings"))
+    args = parser.parse_args()
+
+    server = serve(args.recordings, args.port)
+    print(f"Replaying {args.recordings} on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 @echo off
 
-python "C:.\windowsDNCfinder.py"
+python "C:.\windowsDNCfinder.py" %*
 pause
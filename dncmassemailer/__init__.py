@@ -0,0 +1,6 @@
+"""
+Move PhoneBurner DNC contacts to the DNC folder and draft a mass email to them.
+
+Run it with `python -m dncmassemailer` or `python windowsDNCfinder.py`; the modules
+can also be imported on their own (benchmarks/ does).
+"""
@@ -0,0 +1,103 @@
+"""
+Running many agents' accounts from one config file.
+
+The config file is JSON. Top-level keys are the command line options (with
+underscores or dashes) and become the defaults for every account; "accounts" lists
+the accounts, each with a "username" and any options of its own:
+
+    {
+        "mode": "api",
+        "folders": "all",
+        "delivery": "eml",
+        "parallel": 2,
+        "accounts": [
+            {"username": "jane@example.com", "eml_dir": "drafts/jane"},
+            {"username": "sam@example.com", "password_env": "DNC_PASSWORD_SAM"}
+        ]
+    }
+
+Each account runs as its own process (python -m dncmassemailer --config FILE
+--account USERNAME) with no console input, so an account that would have to prompt
+fails instead of hanging the queue. All of them share the WebDriver cache. So that
+accounts running side by side do not overwrite each other's files, each one's .eml
+drafts and rejected addresses default to dnc_drafts/USERNAME and
+dnc_rejects-USERNAME.csv.
+"""
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+AccountResult = namedtuple("AccountResult", "username returncode seconds")
+
+_print_lock = threading.Lock()
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must hold a JSON object")
+    options = {key.replace("-", "_"): value for key, value in config.items() if key != "accounts"}
+    accounts = config.get("accounts", [])
+    for account in accounts:
+        if not account.get("username"):
+            raise ValueError(f"Every account in {path} needs a username")
+    return options, accounts
+
+
+def account_options(accounts, username):
+    """
+    The options of one account in the config, without its username.
+    """
+    for account in accounts:
+        if account["username"].lower() == username.lower():
+            return {key.replace("-", "_"): value for key, value in account.items() if key != "username"}
+    raise ValueError(f"No account {username!r} in the config file")
+
+
+def account_defaults(username):
+    """
+    Defaults for the output paths every account would otherwise share.
+    """
+    name = re.sub(r"[^A-Za-z0-9@._-]+", "_", username.lower())
+    return {"eml_dir": os.path.join("dnc_drafts", name), "rejects": f"dnc_rejects-{name}.csv"}
+
+
+def _run_account(command, username):
+    start = time.perf_counter()
+    # Unbuffered, so the account's output shows up as it happens, and able to find
+    # the package whatever the working directory
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONUNBUFFERED="1",
+               PYTHONPATH=os.pathsep.join(filter(None, [package_parent, os.environ.get("PYTHONPATH")])))
+    process = subprocess.Popen(command + ["--account", username], stdin=subprocess.DEVNULL, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    for line in process.stdout:
+        with _print_lock:
+            print(f"[{username}] {line}", end="")
+    process.wait()
+    return AccountResult(username, process.returncode, time.perf_counter() - start)
+
+
+def run_queue(command, accounts, parallel=1):
+    """
+    Run command once per account, up to parallel at a time, and return an
+    AccountResult per account in config order.
+    """
+    parallel = max(1, min(parallel, len(accounts)))
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        return list(pool.map(lambda account: _run_account(command, account["username"]), accounts))
+
+
+def print_summary(results, seconds):
+    print(f"\n{'Account':<36} {'Result':<10} {'Seconds':>8}")
+    for result in results:
+        status = "ok" if result.returncode == 0 else f"exit {result.returncode}"
+        print(f"{result.username[:36]:<36} {status:<10} {result.seconds:>8.1f}")
+    failed = sum(result.returncode != 0 for result in results)
+    print(f"\n{len(results)} accounts in {seconds:.1f}s ({failed} failed)")
@@ -0,0 +1,251 @@
+"""
+The browser side of the flow: starting Edge or Chromium, logging in, scanning the folder sidebar,
+and extracting and moving a folder's contacts.
+"""
+import os
+
+from selenium import webdriver
+from selenium.webdriver.edge.service import Service as EdgeService
+from selenium.webdriver.edge.options import Options as EdgeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.webdriver.common.action_chains import ActionChains
+
+from . import contact_grid
+from . import metrics
+from . import mover
+from . import phoneburner_api
+from . import rate_control
+from . import waits
+
+# Name, ID and contact count (when the sidebar shows one) of every folder in the
+# sidebar, read in one round-trip.
+SCAN_FOLDERS_JS = """
+var items = document.getElementsByClassName('contacts-folder-nav-item');
+var folders = [];
+for (var i = 0; i < items.length; i++) {
+    var name = items[i].getElementsByClassName('contacts-folder-nav-name')[0];
+    var count = items[i].getElementsByClassName('contacts-folder-nav-count')[0];
+    var digits = count ? count.textContent.replace(/[^0-9]/g, '') : '';
+    folders.push([name ? name.textContent.trim() : '', items[i].id, digits === '' ? null : parseInt(digits, 10)]);
+}
+return folders;
+"""
+
+# True once no ticked contact is left in the grid.
+MOVE_SETTLED_JS = """
+return !document.querySelector("#main_contact_grid input[type='checkbox']:checked");
+"""
+
+
+# Requests the lean profile never makes: pictures, video/audio and web fonts. The
+# grid, the move dropdown and the modal need none of them.
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+LEAN_ARGUMENTS = [
+    "--headless=new",
+    "--window-size=1280,800",
+    "--disable-extensions",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--mute-audio",
+    "--no-first-run",
+    "--blink-settings=imagesEnabled=false",
+    "--disk-cache-size=1048576",
+    "--media-cache-size=1048576",
+]
+
+
+def start_browser(browser, driver_path, binary=None, headless=False, profile_dir=None, lean=False):
+    """
+    Start Edge or Chrome/Chromium, optionally with a persistent profile directory so
+    its cookies and cache survive between runs. A profile directory can only be used
+    by one browser at a time.
+
+    lean starts a headless browser that returns from page loads at DOMContentLoaded,
+    never loads images, media or fonts and keeps its window and caches small, to cut
+    the memory each browser needs. driver_path None lets Selenium find a driver.
+    """
+    if browser == "edge":
+        options = EdgeOptions()
+        service = EdgeService(driver_path)
+    else:
+        options = ChromeOptions()
+        service = ChromeService(driver_path)
+        # Chromium refuses to start as root inside containers without this
+        options.add_argument("--no-sandbox")
+    if binary:
+        options.binary_location = binary
+    if lean:
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        options.page_load_strategy = "eager"
+    elif headless:
+        options.add_argument("--headless=new")
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    if browser == "edge":
+        driver = webdriver.Edge(service=service, options=options)
+    else:
+        driver = webdriver.Chrome(service=service, options=options)
+    if lean:
+        # Blocked in the network layer, so CSS backgrounds and @font-face are caught too
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    return driver
+
+
+def login(driver, base_url, username, password):
+    # Step 1: Go to the login page
+    login_url = base_url + "/homepage/login"
+    driver.get(login_url)
+    print("\nPage opened...")
+
+    # Step 2: Locate and fill in the username and password fields
+    username_field = driver.find_element(By.ID, 'f_username')
+    password_field = driver.find_element(By.ID, 'f_password')
+    username_field.send_keys(username)
+    password_field.send_keys(password)
+
+    # Step 3: Submit the login form
+    login_button = driver.find_element(By.CSS_SELECTOR, 'button.btn.btn-primary.btn-lg.w-100')
+    login_button.click()
+    print("Logging in...")
+
+    # Wait for the login to process and redirect
+    waits.wait_for(driver, "login", EC.url_changes(login_url))
+
+
+def share_session(driver, base_url, cookies):
+    """
+    Log a fresh driver in by copying another driver's session cookies into it.
+    """
+    # Cookies can only be set for the domain of the page that is open
+    driver.get(base_url + "/homepage/login")
+    driver.delete_all_cookies()
+    for cookie in cookies:
+        cookie = {key: value for key, value in cookie.items() if key in ("name", "value", "path", "secure", "httpOnly", "expiry", "sameSite")}
+        driver.add_cookie(cookie)
+
+
+def is_logged_in(driver, base_url):
+    """
+    Open the contact manager and check it did not bounce back to the login form.
+    """
+    driver.get(base_url + "/cm/index")
+    return "/login" not in driver.current_url and not driver.find_elements(By.ID, 'f_password')
+
+
+def scan_folders(driver, base_url):
+    """
+    Open the contact manager and return (name, id, count) for every sidebar folder.
+    count is None when the sidebar does not show one.
+    """
+    # Step 4: Navigate to the page with the table
+    driver.get(base_url + "/cm/index#params/dmlld19pZD0yNzY2MjU1JnBhZ2U9MQ==")
+    return [tuple(folder) for folder in driver.execute_script(SCAN_FOLDERS_JS)]
+
+
+def move_selected_to_dnc(driver, selected):
+    """
+    Move the ticked contacts to the DNC folder through the move dropdown and, for more
+    than one contact, the confirmation modal.
+    """
+    # Select the DNC option
+    move_dropdown_button = driver.find_element(By.ID, "cm_move_button")
+    move_dropdown_button.click()
+
+    option_to_select = waits.wait_for(driver, "move_dropdown",
+        EC.element_to_be_clickable((By.XPATH, "//ul[@id='cm_move_dropdown']//li//a[text()='DNC']"))
+    )
+    option_to_select.click()
+
+    # Handle potential modal confirmation
+    if selected > 1:
+        try:
+            # Without the old fixed pause the modal may not be up yet, so only a
+            # visible button inside a modal counts
+            modal_present = waits.wait_for(driver, "confirm_modal",
+                EC.visibility_of_element_located((By.CSS_SELECTOR, ".modal .btn-primary"))
+            )
+            driver.execute_script("arguments[0].click();", modal_present)
+
+            confirm_input_box = waits.wait_for(driver, "confirm_input",
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.input-group input.form-control"))
+            )
+            confirm_input_box.send_keys("confirm")
+
+            okay_button = waits.wait_for(driver, "confirm_input",
+                EC.element_to_be_clickable((By.XPATH, "//button[normalize-space()='Okay']"))
+            )
+            driver.execute_script("arguments[0].removeAttribute('disabled')", okay_button)
+            driver.execute_script("arguments[0].scrollIntoView(true);", okay_button)
+            actions = ActionChains(driver)
+            actions.move_to_element(okay_button).click().perform()
+        except (TimeoutException, NoSuchElementException):
+            print("No confirmation input box needed")
+
+    # Wait for the moved (ticked) rows to leave the grid and the modal to close
+    try:
+        waits.wait_for(driver, "move_done", lambda d: d.execute_script(MOVE_SETTLED_JS) and waits.page_idle(d))
+    except TimeoutException:
+        print("WARNING: The moved contacts are still showing in the folder")
+
+
+def move_engine(driver, chunk_size=100, retries=3, committed=None):
+    """
+    A MoveEngine that ticks each chunk by contact ID, moves it through the move
+    dropdown and checks the chunk's rows have left the grid.
+    """
+    def move_chunk(chunk, attempt):
+        if attempt:
+            # Start the retry from a freshly loaded page
+            contact_grid.open_folder_page(driver, driver.current_url)
+        with metrics.phase("select"):
+            missed = contact_grid.select_ids(driver, [contact['id'] for contact in chunk])
+        if len(missed) < len(chunk):
+            with metrics.phase("move"), rate_control.limiter("phoneburner").slot():
+                move_selected_to_dnc(driver, len(chunk) - len(missed))
+
+    def remaining(chunk):
+        with metrics.phase("move"):
+            present = contact_grid.present_ids(driver, [contact['id'] for contact in chunk])
+        return [contact for contact in chunk if contact['id'] in present]
+
+    return mover.MoveEngine(move_chunk, remaining, chunk_size, retries, committed=committed)
+
+
+def process_folder(driver, base_url, folder_id, extraction="batch", echo=False, chunk_size=100, retries=3, index=None, sink=None,
+                   journal=None, export=None, registry=None):
+    """
+    Extract every contact in a folder and move them all to DNC in the browser, one
+    page at a time; mover.move_folder walks the folder and handles the options.
+    Returns the number of contacts and the set of emails found.
+    """
+    view_id = phoneburner_api.folder_view_id(folder_id)
+    committed = (lambda contacts: journal.moved(folder_id, [contact['id'] for contact in contacts])) if journal else None
+
+    def fetch_page(page):
+        # Step 5: Open the folder and wait for the contact grid to load
+        with metrics.phase("extract"):
+            # A page load that times out or is slow counts against the shared limit,
+            # so workers hold back while PhoneBurner is struggling
+            with rate_control.limiter("phoneburner").slot():
+                contact_grid.open_folder_page(driver, contact_grid.folder_page_url(base_url, view_id, page))
+            if extraction == "per-row":
+                return contact_grid.extract_and_select_per_row(driver)
+            return contact_grid.extract_rows(driver)
+
+    # Step 6: Extract and move each page
+    return mover.move_folder(fetch_page, move_engine(driver, chunk_size, retries, committed), folder_id, echo=echo,
+                             index=index, sink=sink, journal=journal, export=export, registry=registry)
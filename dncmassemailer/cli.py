@@ -0,0 +1,645 @@
+"""
+The command line. Selenium, the driver cache and the delivery backends are imported
+only by the code paths that use them, so --help, --index-report, --stop-daemon and
+--mode api start without loading a browser stack, and no browser or driver is
+probed until one is about to be started.
+"""
+import sys
+import os
+import time
+import argparse
+import atexit
+from . import account_queue
+from . import credentials
+from . import daemon
+from . import journal
+from . import metrics
+from . import phoneburner_api
+from . import rate_control
+from . import session
+from . import state_index
+from . import waits
+from . import workers
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Move PhoneBurner DNC contacts to the DNC folder and draft a mass email to them.")
+    parser.add_argument("--config", metavar="PATH",
+                        help="JSON file of default options, and of accounts to run one after another (see account_queue.py)")
+    parser.add_argument("--account", metavar="EMAIL", help="run only this account from --config")
+    parser.add_argument("--parallel", type=int, default=1, help="how many --config accounts to run at once (default: 1)")
+    parser.add_argument("--username", metavar="EMAIL", help="PhoneBurner login (default: DNC_USERNAME, or asked for)")
+    parser.add_argument("--password-env", metavar="NAME", default="DNC_PASSWORD",
+                        help="environment variable holding the password (default: DNC_PASSWORD); the keyring is tried next")
+    parser.add_argument("--keyring-set", metavar="EMAIL", help="store a PhoneBurner password in the system keyring and exit")
+    parser.add_argument("--extraction", choices=["batch", "per-row"], default="batch",
+                        help="batch reads and ticks the whole grid in two script calls; per-row is the original row-by-row loop")
+    parser.add_argument("--mode", choices=["browser", "api"], default="browser",
+                        help="browser drives Edge/Chromium; api talks to PhoneBurner over plain HTTP without a browser")
+    parser.add_argument("--browser", choices=["edge", "chromium"], default="edge" if sys.platform == "win32" else "chromium",
+                        help="browser to drive (default: edge on Windows, chromium elsewhere)")
+    parser.add_argument("--driver", metavar="PATH", help="use this WebDriver binary instead of the driver cache")
+    parser.add_argument("--driver-mirror", metavar="URL",
+                        help="download drivers from this server instead of the vendor CDN (also DNC_DRIVER_MIRROR)")
+    parser.add_argument("--base-url", default=phoneburner_api.BASE_URL,
+                        help="PhoneBurner address (point it at benchmarks/replay_server.py to replay recorded responses)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="in api mode, save every response to DIR for replay_server.py")
+    parser.add_argument("--folders", metavar="NAMES",
+                        help="comma-separated folder names or IDs to process without prompting, or 'all' for every non-empty folder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="how many folders to process at once with --folders (default: number of CPU cores)")
+    parser.add_argument("--move-chunk", type=int, default=100,
+                        help="move contacts to DNC this many at a time, checking each chunk left the folder (default: 100)")
+    parser.add_argument("--move-retries", type=int, default=3,
+                        help="how many times to retry a chunk that did not fully move (default: 3)")
+    parser.add_argument("--max-inflight", type=int, default=rate_control.MAX_IN_FLIGHT,
+                        help="most PhoneBurner requests (or SMTP batches) at once; fewer are sent while the server "
+                             f"throttles or slows down (default: {rate_control.MAX_IN_FLIGHT})")
+    parser.add_argument("--slow-response", type=float, default=rate_control.SLOW_RESPONSE, metavar="SECONDS",
+                        help=f"page loads and requests slower than this count as the server struggling (default: {rate_control.SLOW_RESPONSE:g})")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last run that did not finish, without moving or mailing anything twice")
+    parser.add_argument("--incremental", action="store_true",
+                        help="record every contact in a local index and skip contacts already moved and addresses already emailed")
+    parser.add_argument("--index", metavar="PATH", default=state_index.INDEX_FILE,
+                        help=f"state index file for --incremental (default: {state_index.INDEX_FILE})")
+    parser.add_argument("--index-report", metavar="EMAIL", help="print what the state index holds for an account and exit")
+    parser.add_argument("--dnc-registry", metavar="INDEX",
+                        help="move and mail only the contacts whose phone number is in this DNC registry index, "
+                             "in whichever folders are processed (see dnc_registry.py)")
+    parser.add_argument("--build-registry", metavar="FILE", nargs="+",
+                        help="build the --dnc-registry index from downloaded registry files and exit")
+    parser.add_argument("--export", metavar="PATH",
+                        help="append every contact handled and what was done to it to a .csv, .jsonl or .parquet file (see export.py)")
+    parser.add_argument("--rejects", metavar="PATH", default="dnc_rejects.csv",
+                        help="where to write addresses that fail validation (default: dnc_rejects.csv)")
+    parser.add_argument("--group-by-domain", action="store_true",
+                        help="order the BCC lists by domain so each draft holds as few domains as possible")
+    parser.add_argument("--delivery", choices=["mailto", "smtp", "eml"], default="mailto",
+                        help="open mailto drafts (default), send over SMTP, or write .eml drafts to --eml-dir")
+    parser.add_argument("--template", metavar="PATH",
+                        help="send each contact their own email from this mail-merge template (see mailmerge.py); "
+                             "needs --delivery smtp or eml")
+    parser.add_argument("--batch-size", type=int, default=50, help="BCC addresses per draft or message (default: 50)")
+    parser.add_argument("--smtp-host", help="SMTP server for --delivery smtp")
+    parser.add_argument("--smtp-port", type=int, default=587)
+    parser.add_argument("--smtp-tls", choices=["starttls", "ssl", "none"], default="starttls")
+    parser.add_argument("--smtp-user", help="SMTP login (default: the PhoneBurner email); the password is read from DNC_SMTP_PASSWORD or asked for")
+    parser.add_argument("--smtp-workers", type=int, default=4, help="concurrent SMTP connections (default: 4)")
+    parser.add_argument("--smtp-rate", type=float, help="at most this many SMTP messages per second")
+    parser.add_argument("--eml-dir", metavar="DIR", default="dnc_drafts", help="where --delivery eml writes drafts (default: dnc_drafts)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="append per-phase timings and WebDriver command counts to this JSON lines file")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="also write the run's phase totals to this Prometheus textfile (e.g. for node_exporter)")
+    parser.add_argument("--timeouts", metavar="STEP=SECONDS,...",
+                        help=f"override wait timeouts for: {', '.join(waits.TIMEOUTS)}, draft_interval")
+    parser.add_argument("--profile", choices=["default", "lean"], default="default",
+                        help="lean runs every browser headless without images, media, fonts or extensions to save memory")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="keep Edge's profile (cookies, cache) in DIR between runs; implies --remember")
+    parser.add_argument("--remember", action="store_true",
+                        help="save the login encrypted and skip the login form while it is still valid")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep one logged-in browser running and take folder jobs from --submit over a local socket")
+    parser.add_argument("--submit", action="store_true",
+                        help="send --folders to a running --daemon instead of starting a browser")
+    parser.add_argument("--stop-daemon", action="store_true", help="stop a running --daemon")
+    parser.add_argument("--port", type=int, default=daemon.DEFAULT_PORT, help="local port for --daemon/--submit")
+    return parser
+
+
+# Set up by main() for the functions below
+args = None
+config_accounts = []
+move_options = {}
+mailer = None
+template = None
+run_journal = None
+exporter = None
+resume_state = None
+session_file = None
+failed_folders = []
+
+# Define necessary functions
+def choose_folder(folders):
+    """
+    Print the named folders and ask which one to enter. Returns its (name, id, count).
+    """
+    # The sidebar lists the named folders first; the first unnamed one ends the list
+    named = []
+    for index, folder in enumerate(folders):
+        if not folder[0]:
+            break
+        print(f"{index + 1}. {folder[0]}")
+        named.append(folder)
+
+    # Ask the user to input the number corresponding to the folder they want to enter
+    while True:
+        try:
+            user_choice = int(input("Enter the number of the folder you want to enter: ")) - 1
+            if 0 <= user_choice < len(named):
+                return named[user_choice]
+            else:
+                print(f"Please enter a number from 1 to {len(named)}.")
+        except ValueError:
+            print("Invalid input. Please enter a number.")
+
+def ask_credentials():
+    """
+    The username and password from --username/DNC_USERNAME and the environment or
+    keyring, asking for whatever is missing.
+    """
+    try:
+        username_given = args.username or os.environ.get("DNC_USERNAME") or input("Enter your email: ")
+        password_given = credentials.password_for(username_given, args.password_env)
+        if password_given is None:
+            password_given = input("Enter your password: ")
+    except EOFError:
+        # No console to ask on, e.g. a queued account or a scheduled task
+        print(f"No login to use: set --username/DNC_USERNAME and {args.password_env}, or store the password with --keyring-set. Exiting.")
+        sys.exit(1)
+    return username_given, password_given
+
+def sign_in_browser(driver):
+    """
+    Resume the saved session if it is still valid, otherwise log in (and save the new
+    session when remembering). Returns the username and the password, which is None
+    for a resumed session.
+    """
+    from . import browser
+    saved = session.load(session_file) if session_file else None
+    if saved:
+        username_given, cookies = saved
+        with metrics.phase("login"):
+            browser.share_session(driver, args.base_url, cookies)
+            resumed = browser.is_logged_in(driver, args.base_url)
+        if resumed:
+            print(f"Resumed saved session for {username_given}")
+            return username_given, None
+        print("Saved session has expired, logging in again...")
+
+    username_given, password_given = ask_credentials()
+    with metrics.phase("login"):
+        browser.login(driver, args.base_url, username_given, password_given)
+    if session_file:
+        session.save(session_file, username_given, driver.get_cookies())
+    return username_given, password_given
+
+def sign_in_api(client):
+    """
+    Same as sign_in_browser for the HTTP client.
+    """
+    saved = session.load(session_file) if session_file else None
+    if saved:
+        username_given, cookies = saved
+        client.load_cookies(cookies)
+        with metrics.phase("login"):
+            resumed = client.is_logged_in()
+        if resumed:
+            print(f"Resumed saved session for {username_given}")
+            return username_given
+        client.session.cookies.clear()
+        print("Saved session has expired, logging in again...")
+
+    username_given, password_given = ask_credentials()
+    print("Logging in...")
+    with metrics.phase("login"):
+        client.login(username_given, password_given)
+    if session_file:
+        session.save(session_file, username_given, client.cookies())
+    return username_given
+
+def open_index(username):
+    """
+    The account's state index with --incremental, otherwise None.
+    """
+    if not args.incremental:
+        return None
+    return state_index.StateIndex(username, args.index)
+
+def start_journal(username):
+    """
+    Open the account's journal of this run, continuing the unfinished one with --resume.
+    """
+    global run_journal, resume_state
+    path = journal.journal_path(username)
+    previous = journal.load(path)
+    if previous and args.resume:
+        resume_state = previous
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(previous.started)) if previous.started else "earlier"
+        print(f"Resuming the run from {started}: {len(previous.done)} folders finished, "
+              f"{len(previous.moved)} contacts moved, {len(previous.mailed)} addresses mailed")
+    elif previous:
+        os.replace(path, path + ".old")
+        print(f"WARNING: The last run did not finish and --resume was not given, starting over (its journal is kept in {path}.old)")
+    elif args.resume:
+        print("No unfinished run to resume, starting a new one")
+    run_journal = journal.Journal(path, username, resume=resume_state is not None)
+    move_options["journal"] = run_journal
+
+def start_export(username):
+    """
+    Open --export for the signed-in account, if it was given.
+    """
+    global exporter
+    if args.export:
+        from . import export
+        exporter = export.Exporter(args.export, username)
+        move_options["export"] = exporter
+
+def unfinished(folders):
+    """
+    The folders an interrupted run had not finished yet.
+    """
+    if not resume_state:
+        return folders
+    left = [folder for folder in folders if folder[1] not in resume_state.done]
+    if len(left) < len(folders):
+        print(f"Skipping {len(folders) - len(left)} folders the interrupted run finished")
+    return left
+
+def start_mailer(username):
+    """
+    Start the mail stage for the signed-in account. Processed folders hand it their
+    contacts page by page (through move_options["sink"]) so mail goes out while the
+    remaining contacts are still being read and moved.
+    """
+    global mailer
+    from . import delivery
+    message = delivery.Message.for_sender(username)
+    merge = None
+    if template:
+        from . import mailmerge
+        merge = mailmerge.MailMerge(template, username)
+    if args.delivery == "smtp":
+        smtp_user = args.smtp_user or username
+        smtp_password = credentials.password_for(smtp_user, "DNC_SMTP_PASSWORD", credentials.SMTP_SERVICE)
+        if smtp_password is None and args.smtp_tls != "none":
+            smtp_password = input(f"Enter the SMTP password for {smtp_user}: ")
+        backend = delivery.SmtpBackend(args.smtp_host, args.smtp_port, smtp_user, smtp_password, args.smtp_tls,
+                                       batch_size=args.batch_size, workers=args.smtp_workers, rate=args.smtp_rate)
+    elif args.delivery == "eml":
+        backend = delivery.EmlBackend(args.eml_dir, batch_size=args.batch_size)
+    else:
+        backend = delivery.MailtoBackend(batch_size=args.batch_size, interval=waits.DRAFT_INTERVAL)
+    mailer = delivery.MailBatcher(backend, message, move_options.get("index") or open_index(username), args.group_by_domain,
+                                  journal=run_journal, mailed=resume_state.mailed if resume_state else (), merge=merge)
+    move_options["sink"] = mailer.put_contacts
+    if resume_state:
+        # These contacts may have left their folder already, so they will not be read again
+        unmailed = resume_state.unmailed_contacts()
+        if unmailed:
+            print(f"Mailing {len(unmailed)} addresses the interrupted run read but did not mail")
+            mailer.put_contacts(unmailed)
+    return mailer
+
+def prepare_webdriver():
+    """
+    Return (driver_path, browser_binary) for the chosen browser, from --driver or the
+    driver cache.
+    """
+    if args.driver:
+        return args.driver, None
+    from . import driver_cache
+    try:
+        with metrics.phase("provision"):
+            return driver_cache.ensure_driver(args.browser, mirror=args.driver_mirror)
+    except driver_cache.DriverError as e:
+        print(f"{e}. Exiting.")
+        sys.exit(1)
+
+def start_browser(driver_path, binary, headless=False, profile_dir=None):
+    from . import browser
+    with metrics.phase("provision"):
+        driver = browser.start_browser(args.browser, driver_path, binary, headless=headless, profile_dir=profile_dir,
+                                       lean=args.profile == "lean")
+    return metrics.instrument(driver)
+
+def choose_folders(folders):
+    """
+    The folders --folders picks, exiting if one of them is not in the account. Called
+    right after the sidebar scan, before the journal, export or mail stage is opened,
+    so there is nothing to clean up.
+    """
+    try:
+        return workers.resolve_folders(folders, args.folders.split(","))
+    except ValueError as e:
+        print(f"{e}. Exiting.")
+        sys.exit(1)
+
+def folder_results(results):
+    """
+    Print a pool's results, remember the folders that failed and return the emails found.
+    """
+    failed_folders.extend(result.name for result in results if result.error)
+    return workers.merge_results(results)
+
+def run_api():
+    """
+    Log in, read the chosen folders and move their contacts to DNC over plain HTTP.
+    Returns the username and the set of emails found.
+    """
+    client = phoneburner_api.PhoneBurnerClient(args.base_url, pool_size=max(10, args.workers), record_dir=args.record)
+
+    username_given = sign_in_api(client)
+    print("Logged in!")
+    with metrics.phase("scan"):
+        folders = client.list_folders()
+    chosen = choose_folders(folders) if args.folders else None
+
+    move_options["index"] = open_index(username_given)
+    start_journal(username_given)
+    start_export(username_given)
+    start_mailer(username_given)
+    dnc_folder = next((folder for folder in folders if folder[0] == "DNC"), None)
+    if dnc_folder is None:
+        print("WARNING: No DNC folder found, contacts will not be moved")
+    dnc_folder_id = dnc_folder[1] if dnc_folder else None
+
+    if args.folders:
+        # Every worker shares the one logged-in client
+        def start_worker():
+            return (lambda folder_id: phoneburner_api.process_folder(client, folder_id, dnc_folder_id, **move_options)), (lambda: None)
+
+        return username_given, folder_results(workers.run_pool(unfinished(chosen), start_worker, args.workers))
+
+    chosen_folder = choose_folder(folders)
+    total, emails = phoneburner_api.process_folder(client, chosen_folder[1], dnc_folder_id, echo=True, **move_options)
+    print()
+    print("Number of DNC Contacts Found =", total)
+    return username_given, emails
+
+def run_browser():
+    """
+    Log in, read the chosen folders and move their contacts to DNC by driving a browser.
+    Returns the username and the set of emails found.
+    """
+    from . import browser
+    driver_path, binary = prepare_webdriver()
+
+    # Initialize WebDriver with the correct path
+    driver = start_browser(driver_path, binary, profile_dir=args.profile_dir)
+
+    try:
+        username_given, password_given = sign_in_browser(driver)
+        with metrics.phase("scan"):
+            folders = browser.scan_folders(driver, args.base_url)
+        print("Logged in!")
+        chosen = choose_folders(folders) if args.folders else None
+
+        move_options["index"] = open_index(username_given)
+        start_journal(username_given)
+        start_export(username_given)
+        start_mailer(username_given)
+
+        if args.folders:
+            # Every worker is a headless browser logged in with this browser's session cookies
+            cookies = driver.get_cookies()
+
+            def start_worker():
+                worker = start_browser(driver_path, binary, headless=True)
+                with metrics.phase("login"):
+                    browser.share_session(worker, args.base_url, cookies)
+                return (lambda folder_id: browser.process_folder(worker, args.base_url, folder_id, args.extraction, **move_options)), worker.quit
+
+            chosen = unfinished(chosen)
+            print(f"Processing {len(chosen)} folders with {min(args.workers, len(chosen))} workers...")
+            emails = folder_results(workers.run_pool(chosen, start_worker, args.workers))
+        else:
+            chosen_folder = choose_folder(folders)
+            total, emails = browser.process_folder(driver, args.base_url, chosen_folder[1], args.extraction, echo=True, **move_options)
+            print()
+            print("Number of DNC Contacts Found =", total)
+
+    finally:
+        # Ensure the browser is closed
+        driver.quit()
+        print("PhoneBurner has been closed!")
+        waits.report()
+    return username_given, emails
+
+def run_daemon():
+    """
+    Start one browser, log in, and run folder jobs sent with --submit on it until
+    stopped, so repeat runs skip browser startup and login.
+    """
+    from . import browser
+    driver_path, binary = prepare_webdriver()
+    driver = start_browser(driver_path, binary, profile_dir=args.profile_dir)
+    try:
+        username_given, password_given = sign_in_browser(driver)
+        move_options["index"] = open_index(username_given)
+        start_export(username_given)
+
+        def run_job(selectors):
+            if not browser.is_logged_in(driver, args.base_url):
+                if password_given is None:
+                    raise RuntimeError("The saved session has expired, restart the daemon to log in again")
+                browser.login(driver, args.base_url, username_given, password_given)
+            with metrics.phase("scan"):
+                folders = browser.scan_folders(driver, args.base_url)
+            chosen = workers.resolve_folders(folders, selectors)
+            # A pool of one worker: the warm driver, which stays open after the job
+            start_worker = lambda: ((lambda folder_id: browser.process_folder(driver, args.base_url, folder_id, args.extraction, **move_options)), (lambda: None))
+            results = workers.run_pool(chosen, start_worker, 1)
+            emails = workers.merge_results(results)
+            return {
+                "username": username_given,
+                "folders": [{"name": r.name, "contacts": r.contacts, "emails": len(r.emails), "seconds": r.seconds,
+                             "error": str(r.error) if r.error else None} for r in results],
+                "emails": sorted(emails),
+            }
+
+        daemon.serve(run_job, args.port)
+    finally:
+        if exporter:
+            exporter.close()
+        driver.quit()
+        print("PhoneBurner has been closed!")
+        waits.report()
+
+def run_submit():
+    """
+    Hand --folders to the running daemon and return its username and emails.
+    """
+    response = daemon.submit(args.port, folders=args.folders.split(","))
+    for result in response["folders"]:
+        status = f"  FAILED: {result['error']}" if result["error"] else ""
+        if result["error"]:
+            failed_folders.append(result["name"])
+        print(f"{result['name']}: {result['contacts']} contacts in {result['seconds']:.1f}s{status}")
+    print("Number of unique emails found =", len(response["emails"]))
+    return response["username"], set(response["emails"])
+
+def run_queue(argv):
+    """
+    Run every account in the config file as its own process and report the total time.
+    """
+    start = time.perf_counter()
+    if args.mode == "browser" and not args.driver and not args.submit:
+        # Fill the shared driver cache once so the accounts do not all download it
+        prepare_webdriver()
+    command = [sys.executable, "-m", "dncmassemailer"] + argv
+    results = account_queue.run_queue(command, config_accounts, args.parallel)
+    account_queue.print_summary(results, time.perf_counter() - start)
+    return all(result.returncode == 0 for result in results)
+
+def main(argv=None):
+    global args, config_accounts, move_options, session_file, template
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.config:
+        # Options from the file (and the account's own) become defaults the command line overrides
+        try:
+            config_options, config_accounts = account_queue.load_config(args.config)
+            if args.account:
+                config_options = dict(account_queue.account_defaults(args.account), **config_options)
+                config_options.update(account_queue.account_options(config_accounts, args.account))
+                config_options["username"] = args.account
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        actions = {action.dest: action for action in parser._actions}
+        unknown = sorted(set(config_options) - set(actions) - {"config", "account", "help"})
+        if unknown:
+            parser.error(f"unknown options in {args.config}: {', '.join(unknown)}")
+        for dest, value in config_options.items():
+            if actions[dest].choices and value not in actions[dest].choices:
+                parser.error(f"{dest} in {args.config} must be one of: {', '.join(actions[dest].choices)}")
+        parser.set_defaults(**config_options)
+        args = parser.parse_args(argv)
+    if args.account and not args.folders:
+        parser.error("every account in the queue needs folders, in the config file or with --folders")
+    if args.timeouts:
+        try:
+            waits.configure(args.timeouts.split(","))
+        except ValueError as e:
+            parser.error(f"--timeouts: {e}")
+    if args.delivery == "smtp" and not args.smtp_host:
+        parser.error("--delivery smtp requires --smtp-host")
+    if args.submit and not args.folders:
+        parser.error("--submit needs --folders")
+    if args.template:
+        if args.delivery == "mailto":
+            parser.error("--template sends each contact their own email, use --delivery smtp or eml")
+        from . import mailmerge
+        try:
+            template = mailmerge.Template.load(args.template)
+        except (OSError, mailmerge.TemplateError) as e:
+            parser.error(str(e))
+    if args.export:
+        from . import export
+        try:
+            export.check(args.export)
+        except export.ExportError as e:
+            parser.error(str(e))
+    if args.build_registry and not args.dnc_registry:
+        parser.error("--build-registry needs --dnc-registry, the index file to write")
+    move_options = dict(chunk_size=args.move_chunk, retries=args.move_retries)
+    if args.dnc_registry and not args.build_registry:
+        from . import dnc_registry
+        try:
+            move_options["registry"] = dnc_registry.Registry(args.dnc_registry)
+        except (OSError, dnc_registry.RegistryError) as e:
+            parser.error(str(e))
+    rate_control.configure(args.max_inflight, args.slow_response)
+    metrics.configure(args.metrics, args.prometheus)
+    atexit.register(metrics.finish)
+    atexit.register(rate_control.report)
+    session_file = session.default_session_file(args.profile_dir) if (args.remember or args.profile_dir) else None
+    if session_file:
+        try:
+            session.check()
+        except session.SessionError as e:
+            parser.error(str(e))
+
+    if args.keyring_set:
+        credentials.save_password(args.keyring_set)
+        print(f"Saved the password for {args.keyring_set} in the keyring.")
+        sys.exit(0)
+    elif args.build_registry:
+        from . import dnc_registry
+        start = time.perf_counter()
+        try:
+            count = dnc_registry.build(args.build_registry, args.dnc_registry)
+        except OSError as e:
+            print(f"{e}. Exiting.")
+            sys.exit(1)
+        print(f"Indexed {count} numbers in {args.dnc_registry} in {time.perf_counter() - start:.1f}s")
+        sys.exit(0)
+    elif config_accounts and not args.account:
+        sys.exit(0 if run_queue(argv) else 1)
+    elif args.index_report:
+        stats = state_index.StateIndex(args.index_report, args.index).stats()
+        last_seen = time.strftime("%Y-%m-%d %H:%M", time.localtime(stats["last_seen"])) if stats["last_seen"] else "never"
+        print(f"{args.index_report}: {stats['contacts']} contacts seen ({stats['moved']} moved), "
+              f"{stats['emails']} addresses ({stats['emailed']} emailed), last run {last_seen}")
+        sys.exit(0)
+    elif args.stop_daemon:
+        daemon.submit(args.port, shutdown=True)
+        print("Daemon stopped.")
+        sys.exit(0)
+    elif args.daemon:
+        run_daemon()
+        sys.exit(0)
+    elif args.submit:
+        username_given, emails = run_submit()
+    elif args.mode == "api":
+        username_given, emails = run_api()
+    else:
+        username_given, emails = run_browser()
+
+    # print("Opening Outlook and loading email...")
+    # # Initialize Outlook application
+    # import win32com.client as win32
+    # outlook = win32.Dispatch('outlook.application')
+    # # Create a new mail item
+    # mail = outlook.CreateItem(0)  # 0: olMailItem
+    # # Set email subject
+    # mail.Subject = 'Getting your truck insurance quotes!'
+    # # Set email body (HTML or plain text)
+    # mail.Body = f"""Hey! This is {firstname} from The Insurance Store, I saw that your insurance renewal is coming up in a few weeks. I wanted to let you know about a new exclusive truck insurance market we have that is looking to insure high caliber trucking companies such as yours. Pricing is often 30% cheaper than the competition with superior coverage. Please let me know if you are interested and we'd be happy to get you a quote within 1-2 days!
+
+    # When you have a chance, could you review the following questions/Information below and answer them the best you can:
+    # 1. Owner and Drivers Driver's License Number, Birthday, Years of Experience
+    # 2. Verify Mailing and Garage Address
+    # 3. Scheduled Vehicle/Trailer List and their Listed Values
+    # 4. Cargo Coverage value and Top 3 Types of Cargo most often hauled
+    # 5. Average working Radius/Furthest City Traveled
+    # 6. Target Premium for this year that you would like to be at, or the current premium paid.
+    # 7. If you've got any current Loss Runs or current Certificate of Insurance, those help in making our quotes more competitive!
+
+    # Looking forward to hearing from you soon, thanks so much!!
+    # """
+ 
+    # # Add email addresses to BCC
+    # mail.BCC = ";".join(emails)
+    # # Add email sent to yourself
+    # mail.To = username_given
+ 
+    # # Display the email (this will open the Outlook email editor with the email populated)
+    # mail.Display(True)
+
+    # NEW OUTLOOK DOES NOT SUPPORT THE ABOVE
+    # Emails that did not stream into the mail stage during the run (--submit) go in now
+    if mailer is None:
+        start_mailer(username_given).put(emails)
+    results = mailer.close(args.rejects)
+    if exporter:
+        exporter.close()
+    if run_journal and failed_folders:
+        # Keep the journal so --resume retries the folders that failed
+        run_journal.close()
+    elif run_journal:
+        run_journal.finish()
+    if failed_folders:
+        print(f"WARNING: {len(failed_folders)} folders failed: {', '.join(failed_folders)}")
+    if not results:
+        print("No new emails to draft.")
+        sys.exit(1 if failed_folders else 0)
+    if args.delivery != "mailto":
+        from . import delivery
+        delivery.print_report(results)
+    if failed_folders:
+        sys.exit(1)
@@ -0,0 +1,218 @@
+"""
+Reading and selecting contacts in PhoneBurner's main_contact_grid.
+
+Each contact is rendered as a pair of tr.contact-new rows and only the first row
+of every pair carries the mailto link and the selection checkbox, so every
+helper here looks at the even-indexed rows only.
+
+Two paths are provided:
+  * extract_and_select_per_row - the original loop, a handful of WebDriver
+    calls per contact.
+  * extract_rows / select_rows - one execute_script call to read the whole
+    grid and one more to tick every target checkbox.
+
+open_folder_page loads one page of a folder so either path can be run on it.
+"""
+import base64
+import json
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from . import phoneburner_api
+from . import waits
+
+# How a row's contact ID is worked out, shared by the scripts below.
+CONTACT_ID_JS = """
+function contactId(row, i) {
+    var box = row.querySelector("input[type='checkbox']");
+    return row.getAttribute('data-contact-id') || (box && box.value) || row.id || ('row-' + i);
+}
+"""
+
+# Returns one entry per contact: its position among the tr.contact-new rows,
+# its contact ID, every mailto address in the row, the checkbox state and the text
+# of the row's phoneburner_api.CONTACT_FIELDS cells.
+EXTRACT_ROWS_JS = CONTACT_ID_JS + "var FIELDS = " + json.dumps(phoneburner_api.CONTACT_FIELDS) + ";" + """
+var grid = document.getElementById('main_contact_grid');
+if (!grid) { return []; }
+var rows = grid.querySelectorAll('tr.contact-new');
+var contacts = [];
+for (var i = 0; i < rows.length; i += 2) {
+    var row = rows[i];
+    var emails = [];
+    var links = row.getElementsByTagName('a');
+    for (var j = 0; j < links.length; j++) {
+        var href = links[j].href || links[j].getAttribute('href');
+        if (href && href.indexOf('mailto:') === 0) {
+            emails.push(href.substring(7));
+        }
+    }
+    var fields = {};
+    for (var name in FIELDS) {
+        var cell = row.querySelector('.' + FIELDS[name]);
+        if (cell) { fields[name] = cell.textContent.replace(/\\s+/g, ' ').trim(); }
+    }
+    var box = row.querySelector("input[type='checkbox']");
+    contacts.push({
+        index: i,
+        id: contactId(row, i),
+        emails: emails,
+        checked: box ? box.checked : false,
+        fields: fields
+    });
+}
+return contacts;
+"""
+
+# Ticks the checkbox of every row index in arguments[0]. Boxes that are
+# already ticked are left alone (clicking them again would untick them).
+# Returns the indexes that could not be ticked.
+SELECT_ROWS_JS = """
+var grid = document.getElementById('main_contact_grid');
+var rows = grid ? grid.querySelectorAll('tr.contact-new') : [];
+var missed = [];
+var targets = arguments[0];
+for (var i = 0; i < targets.length; i++) {
+    var row = rows[targets[i]];
+    var box = row ? row.querySelector("input[type='checkbox']") : null;
+    if (!box || box.disabled) {
+        missed.push(targets[i]);
+        continue;
+    }
+    if (!box.checked) {
+        box.click();
+    }
+}
+return missed;
+"""
+
+# Makes the contact IDs in arguments[0] the exact selection: ticks their boxes and
+# unticks every other box. Returns the IDs that could not be ticked.
+SELECT_IDS_JS = CONTACT_ID_JS + """
+var rows = document.querySelectorAll('#main_contact_grid tr.contact-new');
+var wanted = {};
+for (var k = 0; k < arguments[0].length; k++) { wanted[arguments[0][k]] = true; }
+var found = {};
+for (var i = 0; i < rows.length; i += 2) {
+    var id = contactId(rows[i], i);
+    var box = rows[i].querySelector("input[type='checkbox']");
+    if (!box) { continue; }
+    var want = wanted.hasOwnProperty(id) && !box.disabled;
+    if (want) { found[id] = true; }
+    if (box.checked !== want) { box.click(); }
+}
+return arguments[0].filter(function (id) { return !found[id]; });
+"""
+
+# Returns the contact IDs in arguments[0] that are still in the grid.
+PRESENT_IDS_JS = CONTACT_ID_JS + """
+var rows = document.querySelectorAll('#main_contact_grid tr.contact-new');
+var present = {};
+for (var i = 0; i < rows.length; i += 2) { present[contactId(rows[i], i)] = true; }
+return arguments[0].filter(function (id) { return present[id]; });
+"""
+
+# Tags the rows currently in the grid so GRID_READY_JS can tell when they have been
+# replaced by the next page's rows.
+MARK_STALE_JS = """
+var rows = document.querySelectorAll('#main_contact_grid tr.contact-new');
+for (var i = 0; i < rows.length; i++) { rows[i].setAttribute('data-dnc-stale', '1'); }
+"""
+
+# True once the grid is on the page and none of the tagged rows are left.
+GRID_REPLACED_JS = """
+if (!document.getElementById('main_contact_grid')) { return false; }
+return !document.querySelector('#main_contact_grid tr[data-dnc-stale]');
+"""
+
+
+def folder_page_url(base_url, view_id, page=1):
+    """
+    The contact manager URL for one page of a folder. The app keeps its state in a
+    base64-encoded "view_id=...&page=..." hash.
+    """
+    params = base64.b64encode(f"view_id={view_id}&page={page}".encode()).decode()
+    return f"{base_url}/cm/index#params/{params}"
+
+
+def open_folder_page(driver, url):
+    """
+    Load a folder page and wait until its rows have replaced the previous page's and
+    the page has gone idle.
+    Asking for the page that is already open reloads it, which is how the remaining
+    contacts are re-read after the current page has been moved out of the folder.
+    """
+    driver.execute_script(MARK_STALE_JS)
+    if driver.current_url == url:
+        driver.refresh()
+    else:
+        driver.get(url)
+    waits.wait_for(driver, "grid", lambda d: d.execute_script(GRID_REPLACED_JS) and waits.page_idle(d))
+
+
+def extract_rows(driver):
+    """
+    Read every contact in the grid with a single execute_script round-trip.
+    """
+    return driver.execute_script(EXTRACT_ROWS_JS)
+
+
+def select_rows(driver, contacts):
+    """
+    Tick the checkbox of every given contact with a single execute_script round-trip.
+    Returns the contacts whose checkbox could not be ticked.
+    """
+    missed = set(driver.execute_script(SELECT_ROWS_JS, [contact['index'] for contact in contacts]))
+    return [contact for contact in contacts if contact['index'] in missed]
+
+
+def select_ids(driver, contact_ids):
+    """
+    Tick exactly the given contacts, unticking any others. Returns the IDs that
+    could not be ticked.
+    """
+    return driver.execute_script(SELECT_IDS_JS, list(contact_ids))
+
+
+def present_ids(driver, contact_ids):
+    """
+    The given contact IDs that are still showing in the grid.
+    """
+    return set(driver.execute_script(PRESENT_IDS_JS, list(contact_ids)))
+
+
+def extract_and_select_per_row(driver):
+    """
+    The original extraction loop: walks the grid row by row, reading each link and
+    clicking each checkbox through its own WebDriver calls.
+    """
+    table_element = driver.find_element(By.ID, 'main_contact_grid')
+    rows = table_element.find_elements(By.CSS_SELECTOR, 'tr.contact-new')
+
+    contacts = []
+    for index, row in enumerate(rows):
+        if index % 2 != 0:
+            continue
+
+        emails = []
+        # Find all <a> tags within the row
+        for link in row.find_elements(By.TAG_NAME, 'a'):
+            # Check if the <a> tag's href attribute contains mailto:
+            href = link.get_attribute('href')
+            if href and href.startswith('mailto:'):
+                emails.append(href[len('mailto:'):])
+
+        # Click on the checkbox to select the contact
+        checkbox = waits.wait_for(row, "checkbox", EC.element_to_be_clickable((By.XPATH, ".//input[@type='checkbox']")))
+        contact_id = row.get_attribute('data-contact-id') or checkbox.get_attribute('value') or row.get_attribute('id') or f"row-{index}"
+        driver.execute_script("arguments[0].click();", checkbox)
+
+        fields = {}
+        for name, css_class in phoneburner_api.CONTACT_FIELDS.items():
+            cells = row.find_elements(By.CLASS_NAME, css_class)
+            if cells:
+                fields[name] = " ".join(cells[0].text.split())
+
+        contacts.append({'index': index, 'id': contact_id, 'emails': emails, 'checked': True, 'fields': fields})
+    return contacts
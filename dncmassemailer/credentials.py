@@ -0,0 +1,50 @@
+"""
+Where logins come from when nobody is at the keyboard.
+
+A password is taken from an environment variable first (DNC_PASSWORD unless the
+account names another), then from the system keyring (Windows Credential Manager,
+macOS Keychain, Secret Service) if the keyring package is installed, and only then
+asked for. Store one with:
+
+    python windowsDNCfinder.py --keyring-set you@example.com
+"""
+import getpass
+import os
+
+SERVICE = "dncmassemailer"
+SMTP_SERVICE = "dncmassemailer-smtp"
+
+
+def _keyring():
+    try:
+        import keyring
+    except ImportError:
+        return None
+    return keyring
+
+
+def password_for(username, env_name="DNC_PASSWORD", service=SERVICE):
+    """
+    The password for username from the environment or the keyring, or None.
+    """
+    password = os.environ.get(env_name) if env_name else None
+    if password is not None:
+        return password
+    keyring = _keyring()
+    if keyring is None or not username:
+        return None
+    try:
+        return keyring.get_password(service, username)
+    except Exception as e:
+        print(f"WARNING: Could not read the keyring: {e}")
+        return None
+
+
+def save_password(username, service=SERVICE):
+    """
+    Ask for a password and store it in the keyring for username.
+    """
+    keyring = _keyring()
+    if keyring is None:
+        raise RuntimeError("The keyring package is not installed, run: pip install keyring")
+    keyring.set_password(service, username, getpass.getpass(f"Password for {username}: "))
@@ -0,0 +1,91 @@
+"""
+Long-lived mode: one warm, logged-in browser that takes folder jobs over a local socket.
+
+The daemon listens on 127.0.0.1 only. Each request is one JSON line
+{"token": ..., "folders": [...]} and gets one JSON line back with the per-folder
+results and the merged emails. Jobs run one at a time on the shared driver. The token
+is written to a new file only the current user can read, in their own
+~/.dncmassemailer, so other local users cannot submit jobs.
+"""
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+
+from . import session
+
+DEFAULT_PORT = 8766
+
+
+def token_path(port):
+    return os.path.join(session.STATE_DIR, f"daemon-{port}.token")
+
+
+class JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            if not secrets.compare_digest(str(request.get("token", "")), self.server.token):
+                response = {"error": "invalid token"}
+            elif request.get("shutdown"):
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                response = {"stopped": True}
+            else:
+                with self.server.lock:
+                    response = self.server.run_job(request["folders"])
+        except Exception as e:
+            response = {"error": str(e)}
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class JobServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(run_job, port=DEFAULT_PORT):
+    """
+    Serve jobs until a shutdown request arrives. run_job(folders) returns the
+    JSON-serialisable result for one job.
+    """
+    server = JobServer(("127.0.0.1", port), JobHandler)
+    server.run_job = run_job
+    server.lock = threading.Lock()
+    server.token = secrets.token_hex(16)
+
+    path = token_path(port)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    # A stale file from a daemon that died is removed, so the token always goes in a
+    # file created here with the owner-only mode
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(server.token)
+    try:
+        print(f"Waiting for folder jobs on 127.0.0.1:{port} (Ctrl+C to stop)...")
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+def submit(port=DEFAULT_PORT, **request):
+    """
+    Send one request to a running daemon and return its response.
+    """
+    try:
+        with open(token_path(port)) as f:
+            request["token"] = f.read().strip()
+    except FileNotFoundError:
+        sys.exit(f"No daemon is running on port {port}. Start one with --daemon.")
+
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        response = json.loads(conn.makefile("r", encoding="utf-8").readline())
+    if "error" in response:
+        raise RuntimeError(f"Daemon error: {response['error']}")
+    return response
@@ -0,0 +1,408 @@
+"""
+Getting the drafted email to the DNC contacts.
+
+Every backend takes the same Message (sender, subject, body) and the list of
+addresses, sends them BCC in batches and returns one Delivery per address:
+  MailtoBackend  opens a mailto: draft per batch in the default mail client (the
+                 original behaviour)
+  SmtpBackend    sends over SMTP from a pool of reused connections, one per worker,
+                 with a shared messages-per-second limit
+  EmlBackend     writes one ready-to-send .eml draft per batch to a folder
+
+The SMTP and .eml backends can also send_each(): one message per recipient,
+rendered by a mailmerge.MailMerge from a template and the contact's fields.
+
+MailBatcher is the mail stage of a run: it takes addresses as they are scraped and,
+for the SMTP and .eml backends, delivers full batches while scraping goes on.
+
+Test the SMTP backend against a local sink, e.g.
+    python -m aiosmtpd -n -l 127.0.0.1:8025
+    python windowsDNCfinder.py --delivery smtp --smtp-host 127.0.0.1 --smtp-port 8025 --smtp-tls none
+"""
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+import urllib.parse
+import webbrowser
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.charset import QP, Charset
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+
+from . import email_stage
+from . import metrics
+from . import pipeline
+from . import rate_control
+
+SUBJECT = "Getting your truck insurance quotes!"
+BODY = """Hey! This is {firstname} from The Insurance Store...
+"""
+
+# Outlook's mailto handler drops links much longer than this
+MAILTO_LIMIT = 1500
+# Times a batch is sent again after a transient (4xx) SMTP answer such as 421 or 451
+TRANSIENT_RETRIES = 3
+
+Delivery = namedtuple("Delivery", "email status detail")
+
+# UTF-8 bodies as quoted-printable, so drafts stay readable as text
+UTF8 = Charset("utf-8")
+UTF8.body_encoding = QP
+
+
+def firstname(sender):
+    return sender.split('@')[0].capitalize()
+
+
+class Message(namedtuple("Message", "sender subject body")):
+    """
+    The email every contact gets; the sender is also the visible To address unless
+    the message is for one recipient (to).
+    """
+    @classmethod
+    def for_sender(cls, sender, subject=SUBJECT, body=BODY):
+        return cls(sender, subject, body.format(firstname=firstname(sender)))
+
+    def to_email(self, bcc, draft=False, to=None):
+        # The legacy MIMEText API builds a message about 4x faster than EmailMessage,
+        # which matters with one message per recipient
+        message = MIMEText(self.body, "plain", UTF8)
+        message["From"] = self.sender
+        message["To"] = to or self.sender
+        message["Subject"] = self.subject
+        message["Date"] = formatdate(localtime=True)
+        message["Message-ID"] = make_msgid()
+        if draft:
+            # Outlook opens a .eml with this header as an unsent draft
+            message["X-Unsent"] = "1"
+            if bcc:
+                message["Bcc"] = ", ".join(bcc)
+        return message
+
+
+def batches(emails, batch_size):
+    for i in range(0, len(emails), batch_size):
+        yield emails[i:i + batch_size]
+
+
+class RateLimiter:
+    """
+    Spaces calls to wait() at least 1/rate seconds apart across all threads.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class MailtoBackend:
+    # One draft for a short list, so every address has to be known first
+    streaming = False
+
+    def __init__(self, batch_size=50, interval=1.0):
+        self.batch_size = batch_size
+        self.interval = interval
+
+    def send(self, message, emails):
+        print("Opening Outlook and loading email...")
+        subject = urllib.parse.quote(message.subject)
+        body = urllib.parse.quote(message.body)
+        to = urllib.parse.quote(message.sender)
+        if len(",".join(emails)) <= MAILTO_LIMIT:
+            chunks = [emails]
+        else:
+            print("WARNING: Too many emails for one draft. Opening multiple drafts...")
+            chunks = list(batches(emails, self.batch_size))
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(self.interval)
+            bcc = urllib.parse.quote(",".join(chunk))
+            webbrowser.open(f"mailto:{to}?subject={subject}&body={body}&bcc={bcc}")
+        return [Delivery(email, "drafted", "") for email in emails]
+
+
+class EmlBackend:
+    streaming = True
+
+    def __init__(self, directory, batch_size=50):
+        self.directory = directory
+        self.batch_size = batch_size
+        # With the process ID, runs writing to the same folder never pick the same name
+        self.stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.written = 0
+
+    def send(self, message, emails):
+        os.makedirs(self.directory, exist_ok=True)
+        results = []
+        for chunk in batches(emails, self.batch_size):
+            self.written += 1
+            path = os.path.join(self.directory, f"dnc-{self.stamp}-{self.written:03}.eml")
+            with open(path, "wb") as f:
+                f.write(bytes(message.to_email(chunk, draft=True)))
+            results.extend(Delivery(email, "written", path) for email in chunk)
+        print(f"Wrote {len(results)} addresses to {self.directory} ({self.written} drafts so far)")
+        return results
+
+    def send_each(self, merge, entries):
+        """
+        Write one personalized draft per (address, fields) entry.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        results = []
+        for address, fields in entries:
+            self.written += 1
+            path = os.path.join(self.directory, f"dnc-{self.stamp}-{self.written:05}.eml")
+            with open(path, "wb") as f:
+                f.write(bytes(merge.message(address, fields).to_email((), draft=True, to=address)))
+            results.append(Delivery(address, "written", path))
+        print(f"Wrote {len(results)} personalized drafts to {self.directory} ({self.written} so far)")
+        return results
+
+
+class SmtpBackend:
+    """
+    Each worker keeps its connection open for all of its batches, across every round
+    of a run until close() (reconnecting once if the server dropped it), and every
+    batch is a single message with one RCPT TO per address, so the server's answer
+    for each recipient becomes that address's status.
+    A transient (4xx) answer to a whole batch sends it again after a back-off, and the
+    shared "smtp" limiter lowers how many workers may send at once.
+    """
+    streaming = True
+
+    def __init__(self, host, port=587, username=None, password=None, tls="starttls",
+                 batch_size=50, workers=4, rate=None, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.tls = tls
+        self.batch_size = batch_size
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.adaptive = rate_control.limiter("smtp")
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()
+
+    def _connect(self):
+        if self.tls == "ssl":
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.tls == "starttls":
+                connection.starttls(context=ssl.create_default_context())
+        if self.username and self.password:
+            connection.login(self.username, self.password)
+        return connection
+
+    def _checkout(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _deliver(self, sender, email, recipients):
+        """
+        Send one message on a pooled connection and return the refused recipients.
+        """
+        for attempt in range(2):
+            # A pooled connection may have been dropped while it sat idle between
+            # rounds, and so may every other one in the pool: retry on a new one
+            connection = self._connect() if attempt else self._checkout()
+            try:
+                refused = connection.send_message(email, from_addr=sender, to_addrs=recipients)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                if attempt:
+                    raise
+                continue
+            except (smtplib.SMTPException, OSError):
+                self._pool.put(connection)
+                raise
+            self._pool.put(connection)
+            return refused
+
+    def _transmit(self, sender, email, recipients):
+        self.limiter.wait()
+        for attempt in range(TRANSIENT_RETRIES + 1):
+            with self.adaptive.slot() as slot:
+                try:
+                    refused = self._deliver(sender, email, recipients)
+                except smtplib.SMTPRecipientsRefused as e:
+                    refused = e.recipients
+                except smtplib.SMTPResponseException as e:
+                    if 400 <= e.smtp_code < 500 and attempt < TRANSIENT_RETRIES:
+                        # The server asked us to slow down; fewer workers send until it recovers
+                        slot.throttled(min(2 ** attempt, 30))
+                        continue
+                    slot.failed()
+                    return [Delivery(address, "failed", str(e)) for address in recipients]
+                except (smtplib.SMTPException, OSError) as e:
+                    slot.failed()
+                    return [Delivery(address, "failed", str(e)) for address in recipients]
+            return [Delivery(address, "refused", f"{refused[address][0]} {refused[address][1].decode(errors='replace')}")
+                    if address in refused else Delivery(address, "sent", "") for address in recipients]
+
+    def _send_batch(self, message, chunk):
+        return self._transmit(message.sender, message.to_email(chunk), chunk)
+
+    def _send_merged(self, merge, chunk):
+        results = []
+        for address, fields in chunk:
+            message = merge.message(address, fields)
+            results.extend(self._transmit(message.sender, message.to_email((), to=address), [address]))
+        return results
+
+    def _run(self, send_chunk, chunks):
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(chunks)))) as pool:
+            for chunk_results in pool.map(send_chunk, chunks):
+                results.extend(chunk_results)
+        return results
+
+    def send(self, message, emails):
+        chunks = list(batches(emails, self.batch_size))
+        start = time.perf_counter()
+        results = self._run(lambda chunk: self._send_batch(message, chunk), chunks)
+        seconds = time.perf_counter() - start
+        print(f"Sent {len(chunks)} messages to {len(emails)} recipients via {self.host}:{self.port} in {seconds:.1f}s")
+        return results
+
+    def send_each(self, merge, entries):
+        """
+        Send one personalized message per (address, fields) entry. Each worker renders
+        its batch's messages as it sends them.
+        """
+        start = time.perf_counter()
+        results = self._run(lambda chunk: self._send_merged(merge, chunk), list(batches(entries, self.batch_size)))
+        seconds = time.perf_counter() - start
+        print(f"Sent {len(entries)} personalized messages via {self.host}:{self.port} in {seconds:.1f}s")
+        return results
+
+    def close(self):
+        while True:
+            try:
+                connection = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+
+class MailBatcher:
+    """
+    Cleans and dedups addresses put() from any thread, drops the ones the state index
+    has already emailed and hands the rest to the backend: in full rounds (a batch per
+    SMTP worker) as they arrive for streaming backends, all at once on close() for
+    mailto or when grouping by domain. close() returns a Delivery per address and
+    closes the backend's connections, if it keeps any.
+    With a merge (mailmerge.MailMerge) every address gets its own message, rendered
+    from the fields of the contact it came from.
+    """
+    def __init__(self, backend, message, index=None, group_by_domain=False, maxsize=8, journal=None, mailed=(),
+                 merge=None):
+        self.backend = backend
+        self.message = message
+        self.merge = merge
+        self.index = index
+        self.journal = journal
+        # Addresses an interrupted run already mailed
+        self.mailed = set(mailed)
+        self.group_by_domain = group_by_domain
+        self.emails = email_stage.EmailStage()
+        self.results = []
+        self.already_emailed = 0
+        self._pending = []  # (address, contact fields) waiting for a full round
+        self._streaming = backend.streaming and not group_by_domain
+        self._round = backend.batch_size * getattr(backend, "workers", 1)
+        self._stage = pipeline.Stage("mail", self._handle, maxsize, on_close=self._flush)
+
+    def put(self, addresses):
+        """
+        Addresses without contact fields, e.g. from a daemon job.
+        """
+        self._stage.put([{'emails': list(addresses), 'fields': {}}])
+
+    def put_contacts(self, contacts):
+        """
+        The contacts of a page as they are read, with their emails and fields.
+        """
+        self._stage.put([{'emails': contact['emails'], 'fields': contact.get('fields') or {}} for contact in contacts])
+
+    def _handle(self, contacts):
+        entries = []
+        for contact in contacts:
+            # Without a template only the address matters, so no fields are kept
+            fields = contact['fields'] if self.merge else None
+            entries.extend((address, fields) for address in self.emails.process(contact['emails'])
+                           if address not in self.mailed)
+        if self.index and entries:
+            new = self.index.unmailed([address for address, _ in entries])
+            self.already_emailed += len(entries) - len(new)
+            entries = [entry for entry in entries if entry[0] in new]
+        self._pending.extend(entries)
+        while self._streaming and len(self._pending) >= self._round:
+            self._send(self._pending[:self._round])
+            del self._pending[:self._round]
+
+    def _flush(self):
+        if self.group_by_domain:
+            fields = dict(self._pending)
+            groups = email_stage.group_by_domain(address for address, _ in self._pending)
+            self._pending = [(address, fields[address]) for group in groups.values() for address in group]
+        if self._pending:
+            self._send(self._pending)
+            self._pending = []
+
+    def _send(self, entries):
+        with metrics.phase("mail", addresses=len(entries)):
+            if self.merge:
+                results = self.backend.send_each(self.merge, entries)
+            else:
+                results = self.backend.send(self.message, [address for address, _ in entries])
+        self.results.extend(results)
+        if self.journal:
+            self.journal.mailed(delivered(results))
+        if self.index:
+            self.index.mark_emailed(delivered(results))
+
+    def close(self, rejects_path=None):
+        self._stage.close()
+        if hasattr(self.backend, "close"):
+            self.backend.close()
+        if self.emails.rejects and rejects_path:
+            self.emails.write_rejects(rejects_path)
+            print(f"WARNING: {len(self.emails.rejects)} invalid addresses left out, see {rejects_path}")
+        if self.already_emailed:
+            print(f"Skipped {self.already_emailed} addresses already emailed by an earlier run")
+        return self.results
+
+
+def print_report(results):
+    """
+    Print how many addresses ended in each status and list the ones that failed.
+    """
+    counts = Counter(result.status for result in results)
+    print("Delivery: " + ", ".join(f"{count} {status}" for status, count in counts.most_common()))
+    for result in results:
+        if result.status in ("refused", "failed"):
+            print(f"  {result.email}: {result.status} {result.detail}")
+
+
+def delivered(results):
+    return [result.email for result in results if result.status in ("drafted", "written", "sent")]
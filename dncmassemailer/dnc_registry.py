@@ -0,0 +1,257 @@
+"""
+Matching contacts against a DNC registry extract we download ourselves.
+
+--build-registry turns registry files into one index file, and --dnc-registry INDEX
+then moves and mails only the contacts whose phone number is in it, in any folder.
+Registry files hold one number per line; everything but the digits is ignored and
+lines that do not come to 10 digits (11 starting with a 1) are skipped, so header
+lines and the FTC's "area code,number" layout both load.
+
+The index keeps each number as 4 bytes: the 7 digits after the area code, sorted,
+with a table of where each area code's numbers start:
+  magic      8 bytes, MAGIC
+  offsets    AREAS + 1 little-endian uint64, area code a is entries offsets[a] to
+             offsets[a + 1]
+  entries    little-endian uint32
+It is memory-mapped, not read, so opening it is instant and only the pages lookups
+touch are resident. With numpy (pip install numpy) a batch of numbers is looked up
+with one searchsorted per area code in it; without it each number is a bisect.
+
+A build never holds the registry in memory: numbers are first split by the leading
+two digits of their area code into temporary files next to the index, then each of
+those is sorted and deduplicated on its own.
+"""
+import array
+import bisect
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+
+MAGIC = b"DNCREG1\n"
+AREAS = 1000
+HEADER = struct.Struct(f"<8s{AREAS + 1}Q")
+SUBSCRIBER = 10 ** 7
+PARTITION = 10 ** 8
+CHUNK = 16 * 2 ** 20
+
+PHONE_RE = re.compile(r"^\D*(?:1\D*)?(\d{3})\D*(\d{3})\D*(\d{4})(?!\d)")
+NOT_DIGITS = bytes(b for b in range(256) if b not in b"0123456789\n")
+
+
+class RegistryError(Exception):
+    pass
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def normalize(phone):
+    """
+    A scraped phone number ("(555) 010-0000", "+1 555.010.0000 x12") as a 10-digit
+    int, or None if it is not one.
+    """
+    match = PHONE_RE.match(phone or "")
+    return int("".join(match.groups())) if match else None
+
+
+def _parse(data):
+    """
+    The numbers on whole lines of registry data (ending in a newline).
+    """
+    digits = data.translate(None, NOT_DIGITS)
+    numpy = _numpy()
+    if numpy is None:
+        return array.array("q", (int(line[-10:]) for line in digits.split(b"\n")
+                                 if len(line) == 10 or len(line) == 11 and line[0] == 0x31))
+    # Without a Python object per line: find each line's end, keep the lines of 10
+    # digits (or 11 starting with 1) and read the 10 digits before their ends
+    digits = numpy.frombuffer(digits, dtype=numpy.uint8)
+    ends = numpy.flatnonzero(digits == ord("\n"))
+    starts = numpy.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    ends = ends[(lengths == 10) | (lengths == 11) & (digits[starts] == ord("1"))]
+    columns = (digits[ends[:, None] + numpy.arange(-10, 0)] - ord("0")).astype(numpy.int64)
+    return columns @ 10 ** numpy.arange(9, -1, -1, dtype=numpy.int64)
+
+
+def _read_numbers(path):
+    """
+    Yield the numbers in a registry file CHUNK bytes at a time.
+    """
+    with open(path, "rb") as f:
+        rest = b""
+        while True:
+            data = f.read(CHUNK)
+            if not data:
+                break
+            data = rest + data
+            end = data.rfind(b"\n") + 1
+            rest = data[end:]
+            if end:
+                yield _parse(data[:end])
+        if rest:
+            yield _parse(rest + b"\n")
+
+
+def _partition(numbers, files):
+    numpy = _numpy()
+    if numpy is None:
+        buckets = {}
+        for number in numbers:
+            buckets.setdefault(number // PARTITION, array.array("q")).append(number)
+        for key, bucket in buckets.items():
+            bucket.tofile(files[key])
+        return
+    # 100 partitions fit in a byte, which numpy's stable sort does as a radix sort
+    keys = (numbers // PARTITION).astype(numpy.uint8)
+    order = numpy.argsort(keys, kind="stable")
+    numbers, keys = numbers[order], keys[order]
+    starts = numpy.flatnonzero(numpy.diff(keys)) + 1
+    for group in numpy.split(numbers, starts):
+        if len(group):
+            group.astype("<i8").tofile(files[int(group[0] // PARTITION)])
+
+
+def _sorted_partition(path):
+    numpy = _numpy()
+    if numpy is not None:
+        numbers = numpy.fromfile(path, dtype="<i8")
+        numbers.sort()
+        if len(numbers):
+            numbers = numbers[numpy.concatenate(([True], numbers[1:] != numbers[:-1]))]
+        return numbers
+    # Written by _partition in native byte order
+    numbers = array.array("q")
+    with open(path, "rb") as f:
+        numbers.frombytes(f.read())
+    return sorted(set(numbers))
+
+
+def build(sources, path):
+    """
+    Build the index at path from registry files. Returns the number of unique numbers.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    offsets = [0] * (AREAS + 1)
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        files = [open(os.path.join(scratch, f"{key:02}"), "wb") for key in range(AREAS // 10)]
+        try:
+            for source in sources:
+                for numbers in _read_numbers(source):
+                    _partition(numbers, files)
+        finally:
+            for f in files:
+                f.close()
+
+        partial = path + ".tmp"
+        with open(partial, "wb") as out:
+            out.write(HEADER.pack(MAGIC, *offsets))
+            count = 0
+            for key in range(AREAS // 10):
+                numbers = _sorted_partition(os.path.join(scratch, f"{key:02}"))
+                for area in range(key * 10, key * 10 + 10):
+                    start = bisect.bisect_left(numbers, area * SUBSCRIBER)
+                    end = bisect.bisect_left(numbers, (area + 1) * SUBSCRIBER)
+                    entries = numbers[start:end]
+                    if len(entries):
+                        if hasattr(entries, "astype"):
+                            (entries % SUBSCRIBER).astype("<u4").tofile(out)
+                        else:
+                            subscribers = array.array("I", (number % SUBSCRIBER for number in entries))
+                            if sys.byteorder != "little":
+                                subscribers.byteswap()
+                            subscribers.tofile(out)
+                    count += len(entries)
+                    offsets[area + 1] = count
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, *offsets))
+    os.replace(partial, path)
+    return count
+
+
+class Registry:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or not header.startswith(MAGIC):
+                raise RegistryError(f"{path} is not a DNC registry index, build one with --build-registry")
+            self.offsets = HEADER.unpack(header)[1:]
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else None
+        numpy = self._np = _numpy()
+        if self._mmap is None:
+            self._entries = numpy.zeros(0, "<u4") if numpy is not None else []
+        elif numpy is not None:
+            self._entries = numpy.frombuffer(self._mmap, dtype="<u4", count=self.offsets[-1], offset=HEADER.size)
+            self._offsets = numpy.array(self.offsets, dtype=numpy.int64)
+        elif sys.byteorder == "little":
+            self._entries = memoryview(self._mmap)[HEADER.size:].cast("I")
+        else:
+            self._entries = array.array("I", self._mmap[HEADER.size:])
+            self._entries.byteswap()
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __contains__(self, number):
+        if number is None or not 0 <= number < AREAS * SUBSCRIBER:
+            return False
+        area, subscriber = divmod(number, SUBSCRIBER)
+        start, end = self.offsets[area], self.offsets[area + 1]
+        position = bisect.bisect_left(self._entries, subscriber, start, end)
+        return position < end and self._entries[position] == subscriber
+
+    def lookup(self, numbers):
+        """
+        Whether each of a batch of 10-digit numbers is in the registry, as a list of bools.
+        """
+        numpy = self._np
+        if numpy is None or not len(self):
+            return [number in self for number in numbers]
+        numbers = numpy.asarray(numbers, dtype=numpy.int64)
+        found = numpy.zeros(len(numbers), dtype=bool)
+        valid = numpy.flatnonzero((numbers >= 0) & (numbers < AREAS * SUBSCRIBER))
+        areas = numbers[valid] // SUBSCRIBER
+        order = numpy.argsort(areas, kind="stable")
+        valid, areas = valid[order], areas[order]
+        # One searchsorted per area code, over that area code's slice of the index
+        for group in numpy.split(valid, numpy.flatnonzero(numpy.diff(areas)) + 1):
+            if not len(group):
+                continue
+            area = int(numbers[group[0]] // SUBSCRIBER)
+            entries = self._entries[self._offsets[area]:self._offsets[area + 1]]
+            if not len(entries):
+                continue
+            subscribers = (numbers[group] % SUBSCRIBER).astype("<u4")
+            positions = numpy.minimum(numpy.searchsorted(entries, subscribers), len(entries) - 1)
+            found[group] = entries[positions] == subscribers
+        return found.tolist()
+
+    def split(self, contacts):
+        """
+        Split contacts (grid rows) into those whose phone is in the registry and the rest.
+        """
+        numbers = [normalize((contact.get('fields') or {}).get("phone")) for contact in contacts]
+        known = [i for i, number in enumerate(numbers) if number is not None]
+        listed = set()
+        for i, hit in zip(known, self.lookup([numbers[i] for i in known])):
+            if hit:
+                listed.add(i)
+        return ([contact for i, contact in enumerate(contacts) if i in listed],
+                [contact for i, contact in enumerate(contacts) if i not in listed])
+
+    def close(self):
+        if isinstance(self._entries, memoryview):
+            self._entries.release()
+        self._entries = None
+        if self._mmap is not None:
+            self._mmap.close()
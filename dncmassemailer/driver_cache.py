@@ -0,0 +1,333 @@
+"""
+Finding the installed browser and a matching WebDriver, cached between runs.
+
+Drivers live in ~/.dncmassemailer/drivers/<browser>-<major>/. index.json remembers,
+per browser, a fingerprint of the browser binary (path, size, mtime), the version it
+had and the driver that matches it, so a start with an unchanged browser is a file
+stat and a JSON read: no registry query, no --version subprocess, no network.
+
+Downloads stream to a .part file and resume from it after an interruption. A zip is
+only accepted if it passes zipfile's CRC check and contains a driver whose major
+version matches the browser's. That catches a truncated or corrupted download, not a
+tampered one: neither vendor CDN publishes checksums, so there is nothing to compare
+a download from them against. The zip's SHA-256 is kept in index.json as a record of
+what was installed.
+
+Set DNC_DRIVER_MIRROR (or pass mirror=) to fetch from a local server laid out like
+the CDN instead, e.g. http://127.0.0.1:8000 serving LATEST_RELEASE_* files and
+<version>/<zip> paths. A mirror may also serve <zip>.sha256 next to each zip, and a
+download from it is then rejected unless it matches.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+
+import requests
+
+from . import session
+
+CACHE_DIR = os.path.join(session.STATE_DIR, "drivers")
+INDEX_FILE = os.path.join(CACHE_DIR, "index.json")
+
+EDGE_CDN = "https://msedgedriver.microsoft.com"
+CHROME_CDN = "https://storage.googleapis.com/chrome-for-testing-public"
+CHROME_LATEST = "https://googlechromelabs.github.io/chrome-for-testing"
+
+EDGE_FIX = ("HOW TO FIX:\n1. Go to this link: https://developer.microsoft.com/en-us/microsoft-edge/tools/webdriver/?form=MA13LH"
+            " and download the x64 option under the Stable Channel matching your Edge version\n"
+            "2. Unzip it and run again with --driver path\\to\\msedgedriver.exe")
+
+VERSION_RE = re.compile(r"(\d+)\.\d+\.\d+\.\d+")
+
+
+class DriverError(Exception):
+    pass
+
+
+def _exe(name):
+    return name + ".exe" if sys.platform == "win32" else name
+
+
+def _platform(browser):
+    if sys.platform == "win32":
+        return "win64"
+    if sys.platform == "darwin":
+        arm = os.uname().machine == "arm64"
+        if browser == "edge":
+            return "mac64_m1" if arm else "mac64"
+        return "mac-arm64" if arm else "mac-x64"
+    return "linux64"
+
+
+def find_browser(browser):
+    """
+    Path of the installed Edge or Chrome/Chromium binary, or None.
+    """
+    if sys.platform == "win32":
+        roots = [os.environ.get(name) for name in ("PROGRAMFILES(X86)", "PROGRAMFILES", "LOCALAPPDATA")]
+        relative = r"Microsoft\Edge\Application\msedge.exe" if browser == "edge" else r"Google\Chrome\Application\chrome.exe"
+        candidates = [os.path.join(root, relative) for root in roots if root]
+    else:
+        names = ["microsoft-edge", "microsoft-edge-stable"] if browser == "edge" else \
+                ["chromium", "chromium-browser", "google-chrome", "google-chrome-stable"]
+        candidates = [shutil.which(name) for name in names]
+        if sys.platform == "darwin":
+            candidates.append("/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge" if browser == "edge"
+                              else "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome")
+    return next((path for path in candidates if path and os.path.exists(path)), None)
+
+
+def fingerprint(path):
+    """
+    Cheap identity of a binary: it changes whenever the browser is updated.
+    """
+    real = os.path.realpath(path)
+    stat = os.stat(real)
+    return [real, stat.st_size, stat.st_mtime_ns]
+
+
+def get_edge_version():
+    """
+    Edge's version from the registry, for installs the folder scan cannot read.
+    """
+    try:
+        output = subprocess.check_output(["reg", "query", r"HKEY_CURRENT_USER\Software\Microsoft\Edge\BLBeacon", "/v", "version"], shell=True, text=True)
+        match = re.search(r"version\s+REG_SZ\s+([\d.]+)", output)
+        if match:
+            return match.group(1)
+        else:
+            raise Exception("Edge version not found.")
+    except Exception as e:
+        print(f"Error fetching Edge version: {e}")
+        return None
+
+
+def get_binary_version(path):
+    """
+    Version of a browser or driver binary from its --version output.
+    """
+    try:
+        output = subprocess.check_output([path, "--version"], text=True, stderr=subprocess.STDOUT)
+        match = VERSION_RE.search(output)
+        if match:
+            return match.group(0)
+        else:
+            raise Exception("Version not found.")
+    except Exception as e:
+        print(f"Error fetching version of {path}: {e}")
+        return None
+
+
+def browser_version(browser, path):
+    """
+    On Windows the Application folder holds a directory named after the installed
+    version, which is read without starting any process.
+    """
+    if sys.platform == "win32":
+        versions = [name for name in os.listdir(os.path.dirname(path)) if VERSION_RE.fullmatch(name)]
+        if versions:
+            return max(versions, key=lambda v: [int(part) for part in v.split(".")])
+        if browser == "edge":
+            return get_edge_version()
+    return get_binary_version(path)
+
+
+def _load_index():
+    try:
+        with open(INDEX_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"browsers": {}, "compat": {}}
+
+
+def _save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = INDEX_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, INDEX_FILE)
+
+
+def _get(url, **kwargs):
+    response = requests.get(url, timeout=30, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+def _driver_version_for(browser, version, mirror, index):
+    """
+    The driver version to use for a browser version. Edge ships a driver for every
+    browser build; otherwise the newest driver for the major version is used. Lookups
+    are remembered in the index's compatibility map.
+    """
+    if browser == "edge":
+        return version
+    major = version.split(".")[0]
+    key = f"{browser}-{major}"
+    if key in index["compat"]:
+        return index["compat"][key]
+
+    url = f"{mirror or CHROME_LATEST}/LATEST_RELEASE_{major}"
+    driver_version = _get(url).text.strip()
+    index["compat"][key] = driver_version
+    return driver_version
+
+
+def _edge_latest(major, mirror):
+    platform = {"win64": "WINDOWS", "linux64": "LINUX"}.get(_platform("edge"), "MACOS")
+    response = _get(f"{mirror or EDGE_CDN}/LATEST_RELEASE_{major}_{platform}")
+    # Microsoft serves this file as UTF-16 with a byte order mark
+    text = response.content.decode("utf-16") if response.content[:2] in (b"\xff\xfe", b"\xfe\xff") else response.text
+    return text.strip()
+
+
+def _zip_url(browser, driver_version, mirror):
+    platform = _platform(browser)
+    if browser == "edge":
+        return f"{mirror or EDGE_CDN}/{driver_version}/edgedriver_{platform}.zip"
+    return f"{mirror or CHROME_CDN}/{driver_version}/{platform}/chromedriver-{platform}.zip"
+
+
+def download(url, path, attempts=3):
+    """
+    Stream url to path, resuming from path + ".part" after an interrupted attempt.
+    """
+    part = path + ".part"
+    for attempt in range(1, attempts + 1):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with requests.get(url, stream=True, timeout=30, headers=headers) as r:
+                if r.status_code == 416:
+                    # The .part file is already complete
+                    break
+                r.raise_for_status()
+                mode = "ab" if offset and r.status_code == 206 else "wb"
+                with open(part, mode) as f:
+                    for chunk in r.iter_content(chunk_size=1 << 16):
+                        f.write(chunk)
+            break
+        except requests.RequestException as e:
+            if attempt == attempts or (getattr(e, "response", None) is not None and e.response.status_code == 404):
+                raise
+            print(f"Download interrupted ({e}), resuming...")
+            time.sleep(attempt)
+    os.replace(part, path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _verify_zip(url, zip_path, mirror=None):
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        bad = zip_ref.testzip()
+        if bad:
+            raise DriverError(f"Corrupt file {bad} in {url}")
+    checksum = _sha256(zip_path)
+    if not mirror:
+        return checksum
+    try:
+        published = requests.get(url + ".sha256", timeout=10)
+    except requests.RequestException:
+        published = None
+    if published is not None and published.ok:
+        expected = published.text.split()[0].lower()
+        if expected != checksum:
+            raise DriverError(f"Checksum mismatch for {url}: expected {expected}, got {checksum}")
+    return checksum
+
+
+def _install(browser, browser_version_, mirror, index):
+    major = browser_version_.split(".")[0]
+    driver_dir = os.path.join(CACHE_DIR, f"{browser}-{major}")
+    driver_version = _driver_version_for(browser, browser_version_, mirror, index)
+
+    os.makedirs(driver_dir, exist_ok=True)
+    url = _zip_url(browser, driver_version, mirror)
+    zip_path = os.path.join(driver_dir, f"{driver_version}.zip")
+    print(f"Downloading WebDriver {driver_version} from {url}...")
+    try:
+        download(url, zip_path)
+    except requests.HTTPError:
+        if browser != "edge":
+            raise
+        # Not every Edge build has its own driver; fall back to the newest for the major
+        driver_version = _edge_latest(major, mirror)
+        url = _zip_url(browser, driver_version, mirror)
+        zip_path = os.path.join(driver_dir, f"{driver_version}.zip")
+        print(f"Downloading WebDriver {driver_version} from {url}...")
+        download(url, zip_path)
+    checksum = _verify_zip(url, zip_path, mirror)
+
+    print(f"Extracting {zip_path} to {driver_dir}...")
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(driver_dir)
+    os.remove(zip_path)
+
+    name = _exe("msedgedriver" if browser == "edge" else "chromedriver")
+    found = glob.glob(os.path.join(driver_dir, "**", name), recursive=True)
+    if not found:
+        raise DriverError(f"{name} not found in {url}")
+    driver_path = found[0]
+    if sys.platform != "win32":
+        os.chmod(driver_path, 0o755)
+
+    installed = get_binary_version(driver_path)
+    if not installed or installed.split(".")[0] != major:
+        raise DriverError(f"Downloaded driver reports version {installed}, expected {major}.x")
+
+    index["compat"][f"{browser}-{major}"] = driver_version
+    return {"driver": driver_path, "driver_version": installed, "driver_size": os.path.getsize(driver_path), "sha256": checksum}
+
+
+def ensure_driver(browser="edge", mirror=None):
+    """
+    Return (driver_path, browser_binary) for the installed browser, downloading a
+    matching driver only when the cache has none.
+    """
+    mirror = (mirror or os.environ.get("DNC_DRIVER_MIRROR") or "").rstrip("/") or None
+    binary = find_browser(browser)
+    if not binary:
+        raise DriverError(f"No {browser} browser found on this machine")
+
+    index = _load_index()
+    cached = index["browsers"].get(browser)
+    current = fingerprint(binary)
+    if (cached and cached["fingerprint"] == current and os.path.exists(cached["driver"])
+            and os.path.getsize(cached["driver"]) == cached["driver_size"]):
+        return cached["driver"], binary
+
+    version = browser_version(browser, binary)
+    if not version:
+        raise DriverError(f"Unable to determine the {browser} version")
+    print(f"Detected {browser} version: {version}")
+
+    # Same major as a driver already in the cache (e.g. the browser was patched): reuse it
+    if cached and cached["browser_version"].split(".")[0] == version.split(".")[0] and os.path.exists(cached["driver"]):
+        entry = dict(cached)
+    else:
+        try:
+            entry = _install(browser, version, mirror, index)
+        except (requests.RequestException, DriverError, zipfile.BadZipFile) as e:
+            print(f"Failed to fetch WebDriver for {browser} {version}: {e}")
+            if browser == "edge":
+                print(EDGE_FIX)
+            raise DriverError(str(e))
+
+    entry.update({"fingerprint": current, "browser_version": version})
+    index["browsers"][browser] = entry
+    _save_index(index)
+    print("WebDriver is ready.")
+    return entry["driver"], binary
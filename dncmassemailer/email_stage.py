@@ -0,0 +1,127 @@
+"""
+Cleaning up the addresses scraped from mailto links before they go into drafts.
+
+Each raw value is decoded (mailto: prefix, ?subject=... suffix, %-encoding, several
+addresses in one link), trimmed and lower-cased, checked against the RFC 5321/5322
+rules that matter in practice, and deduplicated. Addresses that fail are kept with
+the reason so they can be written to a rejects report instead of into a draft.
+
+Deduplication keeps an 8-byte BLAKE2b digest per address in a set of ints rather
+than the address strings themselves, so its size does not depend on address length
+(about 40% smaller for typical addresses, see benchmarks/bench_emails.py).
+"""
+import csv
+import hashlib
+import re
+from collections import defaultdict
+from urllib.parse import unquote
+
+# dot-atom local part (RFC 5322 section 3.2.3) and a hostname domain
+LOCAL_RE = re.compile(r"[a-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*\Z")
+LABEL_RE = re.compile(r"(?!-)[a-z0-9-]{1,63}(?<!-)\Z")
+SEPARATORS_RE = re.compile(r"[,;]")
+
+
+def split_raw(raw):
+    """
+    The individual addresses in a raw mailto href or address string.
+    """
+    value = raw.strip()
+    if value[:7].lower() == "mailto:":
+        value = value[7:]
+    value = unquote(value.split("?", 1)[0])
+    return [part for part in SEPARATORS_RE.split(value) if part.strip()]
+
+
+def normalize(address):
+    """
+    Trim an address, drop a display name / angle brackets and lower-case it.
+    """
+    address = address.strip()
+    if "<" in address and address.endswith(">"):
+        address = address[address.rindex("<") + 1:-1]
+    return address.strip().lower()
+
+
+def invalid_reason(address):
+    """
+    Why an already normalized address is not usable, or None if it is fine.
+    """
+    if len(address) > 254:
+        return "longer than 254 characters"
+    local, at, domain = address.rpartition("@")
+    if not at or not local or not domain:
+        return "missing @, local part or domain"
+    if len(local) > 64:
+        return "local part longer than 64 characters"
+    if not LOCAL_RE.match(local):
+        return "invalid characters in local part"
+    try:
+        domain = domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        return "invalid international domain"
+    labels = domain.split(".")
+    if len(labels) < 2:
+        return "domain has no top-level domain"
+    if not all(LABEL_RE.match(label) for label in labels):
+        return "invalid domain"
+    if not labels[-1].isalpha() and not labels[-1].startswith("xn--"):
+        return "invalid top-level domain"
+    return None
+
+
+def _digest(address):
+    return int.from_bytes(hashlib.blake2b(address.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class EmailStage:
+    """
+    Streams raw addresses through decode, normalize, validate and dedup.
+
+        stage = EmailStage()
+        for address in stage.process(raw_addresses):
+            ...
+        stage.write_rejects("rejects.csv")
+    """
+    def __init__(self):
+        self._seen = set()
+        self.rejects = []
+        self.duplicates = 0
+
+    def process(self, raw_addresses):
+        for raw in raw_addresses:
+            for part in split_raw(raw):
+                address = normalize(part)
+                reason = invalid_reason(address)
+                if reason:
+                    self.rejects.append((raw, reason))
+                    continue
+                digest = _digest(address)
+                if digest in self._seen:
+                    self.duplicates += 1
+                    continue
+                self._seen.add(digest)
+                yield address
+
+    def write_rejects(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["raw", "reason"])
+            writer.writerows(self.rejects)
+
+
+def clean(raw_addresses):
+    """
+    Normalized, valid, unique addresses from a few raw values, e.g. one contact's.
+    """
+    return list(EmailStage().process(raw_addresses))
+
+
+def group_by_domain(addresses):
+    """
+    Addresses grouped by domain, largest group first.
+    """
+    groups = defaultdict(list)
+    for address in addresses:
+        groups[address.rpartition("@")[2]].append(address)
+    return dict(sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])))
@@ -0,0 +1,176 @@
+"""
+A record of every contact a run handled, for compliance and analytics jobs to read
+instead of scraping PhoneBurner again.
+
+--export PATH writes one row per contact as soon as what happened to it is known:
+  account, folder, id   the PhoneBurner login, folder ID and contact ID
+  name, email, phone    the contact's grid cells (several emails are joined by "; ")
+  company, renewal_date
+  action                moved, move_failed, already_moved (an earlier run moved it,
+                        per the state index), not_moved (no DNC folder) or
+                        not_listed (not on the --dnc-registry, left in the folder)
+  timestamp             when the action was taken, in UTC
+The format follows the extension: .csv and .jsonl are appended to, a run at a time,
+and flushed after every page or chunk, so only the rows being written are in memory
+and the file can be read while a run is going. .parquet needs pyarrow (pip install
+pyarrow); a Parquet file cannot be appended to, so rows are written in row groups of
+ROW_GROUP and a run that finds the file already there writes name-2.parquet,
+name-3.parquet and so on beside it, which pyarrow.dataset reads as one table. A
+Parquet file is only readable once the run closes it, so use .csv or .jsonl where a
+crashed run's rows must survive.
+"""
+import csv
+import datetime
+import json
+import os
+import threading
+import time
+
+COLUMNS = ("account", "folder", "id", "name", "email", "phone", "company", "renewal_date", "action", "timestamp")
+FORMATS = ("csv", "jsonl", "parquet")
+ROW_GROUP = 10000
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_format(path):
+    """
+    The format named by path's extension.
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "ndjson":
+        return "jsonl"
+    if extension not in FORMATS:
+        raise ExportError(f"{path}: export files must end in .csv, .jsonl or .parquet")
+    return extension
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def check(path):
+    """
+    Raise ExportError if path cannot be exported to, before a run starts.
+    """
+    if export_format(path) == "parquet" and _pyarrow() is None:
+        raise ExportError("Exporting to Parquet needs pyarrow, run: pip install pyarrow")
+
+
+def _iso(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+class CsvWriter:
+    def __init__(self, path):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if new:
+            self._writer.writerow(COLUMNS)
+
+    def write(self, rows, timestamp):
+        stamp = (_iso(timestamp),)
+        self._writer.writerows([row + stamp for row in rows])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, rows, timestamp):
+        stamp = (_iso(timestamp),)
+        self._file.write("".join(json.dumps(dict(zip(COLUMNS, row + stamp))) + "\n" for row in rows))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, row_group=ROW_GROUP):
+        pyarrow = self._pyarrow = _pyarrow()
+        if pyarrow is None:
+            raise ExportError("Exporting to Parquet needs pyarrow, run: pip install pyarrow")
+        self.schema = pyarrow.schema([(name, pyarrow.string()) for name in COLUMNS[:-1]]
+                                     + [(COLUMNS[-1], pyarrow.timestamp("ms", tz="UTC"))])
+        self.path = self._free_path(path)
+        self._writer = pyarrow.parquet.ParquetWriter(self.path, self.schema)
+        self._row_group = row_group
+        self._pending = []
+
+    @staticmethod
+    def _free_path(path):
+        stem, extension = os.path.splitext(path)
+        n = 1
+        while os.path.exists(path):
+            n += 1
+            path = f"{stem}-{n}{extension}"
+        return path
+
+    def write(self, rows, timestamp):
+        stamp = (int(timestamp * 1000),)
+        self._pending.extend(row + stamp for row in rows)
+        if len(self._pending) >= self._row_group:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        columns = list(zip(*self._pending))
+        arrays = [self._pyarrow.array(column, self._pyarrow.string()) for column in columns[:-1]]
+        arrays.append(self._pyarrow.array(columns[-1], self.schema.field(COLUMNS[-1]).type))
+        self._writer.write_table(self._pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self._pending = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+class Exporter:
+    """
+    Turns the contacts process_folder handles into rows for one writer, shared by
+    every worker of a run.
+    """
+    def __init__(self, path, account):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.account = account
+        self._writer = WRITERS[export_format(path)](path)
+        self.path = getattr(self._writer, "path", path)
+        self._lock = threading.Lock()
+        self.rows = 0
+
+    def contacts(self, folder, contacts, action):
+        """
+        Record what was done to contacts (grid rows) of folder.
+        """
+        if not contacts:
+            return
+        rows = []
+        for contact in contacts:
+            fields = contact.get('fields') or {}
+            rows.append((self.account, folder, contact['id'], fields.get("name"), "; ".join(contact.get('emails', [])),
+                         fields.get("phone"), fields.get("company"), fields.get("renewal_date"), action))
+        with self._lock:
+            self._writer.write(rows, time.time())
+            self.rows += len(rows)
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+        print(f"Exported {self.rows} contacts to {self.path}")
@@ -0,0 +1,139 @@
+"""
+A crash-safe record of a run's progress, so --resume can pick up where it stopped.
+
+Each account has one journal, ~/.dncmassemailer/journals/<account>.jsonl. Every
+record is appended and flushed to disk as soon as the step it describes is done:
+  extracted    contacts read from a folder page (ID, emails and grid fields)
+  moved        contact IDs of a move chunk that left the folder
+  mailed       addresses of a mail batch the backend accepted
+  folder_done  a folder that was processed completely
+The journal is deleted when a run finishes with every folder processed; it is kept
+when a folder failed, as after a crash. A run with --resume skips finished folders,
+does not move or mail anything again, and mails the contacts that were read (and
+may already have left their folder) but not mailed, so at most the one chunk or
+batch in flight at the crash is repeated.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+from . import session
+
+JOURNAL_DIR = os.path.join(session.STATE_DIR, "journals")
+
+
+def journal_path(account, directory=JOURNAL_DIR):
+    return os.path.join(directory, re.sub(r"[^A-Za-z0-9@._-]+", "_", account.lower()) + ".jsonl")
+
+
+class ResumeState:
+    """
+    What an unfinished journal says was already done.
+    """
+    def __init__(self):
+        self.emails = {}  # folder -> emails of every contact read
+        self.fields = {}  # email -> grid fields of its contact, for mail merge
+        self.moved = set()
+        self.mailed = set()
+        self.done = set()
+        self.started = None
+
+    def apply(self, record):
+        kind = record.get("type")
+        if kind == "run":
+            self.started = record.get("ts")
+        elif kind == "extracted":
+            emails = self.emails.setdefault(record["folder"], [])
+            for contact in record["contacts"]:
+                emails.extend(contact["emails"])
+                if contact.get("fields"):
+                    self.fields.update(dict.fromkeys(contact["emails"], contact["fields"]))
+        elif kind == "moved":
+            self.moved.update(record["ids"])
+        elif kind == "mailed":
+            self.mailed.update(record["emails"])
+        elif kind == "folder_done":
+            self.done.add(record["folder"])
+
+    def unmailed(self):
+        """
+        Emails that were read but never mailed, in the order they were read.
+        """
+        seen = set(self.mailed)
+        emails = []
+        for folder_emails in self.emails.values():
+            for email in folder_emails:
+                if email not in seen:
+                    seen.add(email)
+                    emails.append(email)
+        return emails
+
+    def unmailed_contacts(self):
+        """
+        unmailed() as contacts with the fields they were read with.
+        """
+        return [{'emails': [email], 'fields': self.fields.get(email, {})} for email in self.unmailed()]
+
+
+def load(path):
+    """
+    The ResumeState of an unfinished journal, or None if there is none. A record cut
+    off by the crash (the last line) is ignored.
+    """
+    if not os.path.exists(path):
+        return None
+    state = ResumeState()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                state.apply(json.loads(line))
+            except ValueError:
+                break
+    return state
+
+
+class Journal:
+    def __init__(self, path, account, resume=False):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        self._write({"type": "run", "account": account, "resume": resume})
+
+    def _write(self, record):
+        record["ts"] = time.time()
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def extracted(self, folder, contacts):
+        self._write({"type": "extracted", "folder": folder,
+                     "contacts": [{"id": contact['id'], "emails": contact['emails'], "fields": contact.get('fields') or {}}
+                                  for contact in contacts]})
+
+    def moved(self, folder, contact_ids):
+        self._write({"type": "moved", "folder": folder, "ids": list(contact_ids)})
+
+    def mailed(self, emails):
+        self._write({"type": "mailed", "emails": list(emails)})
+
+    def folder_done(self, folder):
+        self._write({"type": "folder_done", "folder": folder})
+
+    def close(self):
+        """
+        Stop writing but keep the journal, so --resume can retry what did not finish.
+        """
+        with self._lock:
+            self._file.close()
+
+    def finish(self):
+        """
+        The run completed: nothing is left to resume.
+        """
+        self.close()
+        os.remove(self.path)
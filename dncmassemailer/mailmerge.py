@@ -0,0 +1,100 @@
+"""
+Personalized email: one message per contact, rendered from a template compiled once.
+
+A template file reads like an email: a "Subject:" line, a blank line, then the body.
+Both may use placeholders, {field} or {field|fallback}:
+  firstname, sender                     the signed-in agent, as in the default email
+  email                                 the recipient's address
+  name, company, renewal_date, phone    the contact's cells in the grid
+                                        (phoneburner_api.CONTACT_FIELDS)
+A field the contact does not have renders as its fallback, or as nothing. Write {{
+and }} for literal braces. For example:
+
+    Subject: Your truck insurance renewal on {renewal_date|its way}
+
+    Hi {name|there}, this is {firstname} from The Insurance Store. I saw that the
+    policy for {company|your company} renews on {renewal_date|soon}...
+
+With a template, the mail stage hands the backend (address, fields) pairs a round at
+a time and each worker renders the messages of its own batch just before sending
+them, so only a round of messages ever exists at once.
+"""
+import re
+
+from . import delivery
+from . import phoneburner_api
+
+SENDER_FIELDS = ("firstname", "sender")
+FIELDS = SENDER_FIELDS + ("email",) + tuple(phoneburner_api.CONTACT_FIELDS)
+
+PLACEHOLDER_RE = re.compile(r"\{\{|\}\}|\{(\w+)(?:\|([^{}]*))?\}|[{}]")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def compile_text(text):
+    """
+    Turn template text into a str.format string with one positional slot per
+    placeholder, and the (field, fallback) each slot is filled from.
+    """
+    parts = []
+    slots = []
+    position = 0
+    for match in PLACEHOLDER_RE.finditer(text):
+        parts.append(text[position:match.start()].replace("{", "{{").replace("}", "}}"))
+        position = match.end()
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            parts.append(token)
+        elif match.group(1) is None:
+            raise TemplateError(f"Unmatched {token!r} in the template, write {token * 2} for a literal brace")
+        elif match.group(1) not in FIELDS:
+            raise TemplateError(f"Unknown field {{{match.group(1)}}} in the template, use one of: {', '.join(FIELDS)}")
+        else:
+            parts.append(f"{{{len(slots)}}}")
+            slots.append((match.group(1), match.group(2) or ""))
+    parts.append(text[position:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts), slots
+
+
+class Template:
+    def __init__(self, subject, body):
+        self._subject, self._subject_slots = compile_text(subject)
+        self._body, self._body_slots = compile_text(body)
+        self.fields = {field for field, _ in self._subject_slots + self._body_slots}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        header, separator, body = text.partition("\n\n")
+        if not separator or not header.lower().startswith("subject:") or "\n" in header.strip():
+            raise TemplateError(f"{path} must start with a Subject: line and a blank line before the body")
+        return cls(header[len("subject:"):].strip(), body)
+
+    def render(self, values):
+        """
+        The (subject, body) for one recipient's values.
+        """
+        subject = self._subject.format(*[values.get(field) or fallback for field, fallback in self._subject_slots])
+        body = self._body.format(*[values.get(field) or fallback for field, fallback in self._body_slots])
+        return subject, body
+
+
+class MailMerge:
+    """
+    A template bound to the signed-in sender.
+    """
+    def __init__(self, template, sender):
+        self.template = template
+        self.sender = sender
+        self.sender_fields = {"firstname": delivery.firstname(sender), "sender": sender}
+
+    def message(self, address, fields):
+        """
+        The Message for one recipient and the fields scraped for their contact.
+        """
+        subject, body = self.template.render({**self.sender_fields, **(fields or {}), "email": address})
+        return delivery.Message(self.sender, subject, body)
@@ -0,0 +1,166 @@
+"""
+Where a run spends its time, phase by phase.
+
+Code runs a phase inside `with metrics.phase("login"):`. Each phase records how long
+it took and how many WebDriver commands (drivers passed to instrument()) and HTTP
+requests (counted by the API client) it sent, per thread, so workers running
+side by side each count their own commands.
+
+Phases used by a run:
+  provision   finding/downloading the WebDriver and starting the browser
+  login       signing in, or resuming a saved session
+  scan        reading the folder sidebar
+  extract     opening a grid page and reading its rows
+  select      ticking the rows of a move chunk
+  move        the move dropdown, confirmation and waiting for the move to finish
+  mail        handing a batch of addresses to the delivery backend
+
+With --metrics every finished phase is appended to a JSON lines file as it happens,
+followed by one summary line per phase at the end of the run. With --prometheus the
+totals are also written in the Prometheus text format for node_exporter's textfile
+collector.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+RUN_ID = uuid.uuid4().hex[:12]
+
+_lock = threading.Lock()
+_local = threading.local()
+_totals = {}  # phase -> {"calls", "seconds", "max", "commands", "requests", "errors"}
+_started = time.time()
+_jsonl = None
+_prometheus = None
+
+
+def configure(jsonl_path=None, prometheus_path=None):
+    global _jsonl, _prometheus
+    if jsonl_path:
+        os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+        _jsonl = open(jsonl_path, "a", encoding="utf-8")
+    _prometheus = prometheus_path
+
+
+def _emit(event):
+    if _jsonl:
+        with _lock:
+            _jsonl.write(json.dumps(event) + "\n")
+            _jsonl.flush()
+
+
+def count(kind, n=1):
+    """
+    Add n to a counter ("commands" or "requests") of the phase running on this thread.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1][kind] += n
+
+
+@contextmanager
+def phase(name, **labels):
+    """
+    Time a phase and count the commands sent during it. Nested phases count their
+    own commands; the outer phase's time includes theirs.
+    """
+    stack = _local.__dict__.setdefault("stack", [])
+    counters = {"commands": 0, "requests": 0}
+    stack.append(counters)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        with _lock:
+            totals = _totals.setdefault(name, {"calls": 0, "seconds": 0.0, "max": 0.0, "commands": 0, "requests": 0, "errors": 0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["max"] = max(totals["max"], seconds)
+            totals["commands"] += counters["commands"]
+            totals["requests"] += counters["requests"]
+            totals["errors"] += error is not None
+        _emit({"run": RUN_ID, "ts": time.time(), "event": "phase", "phase": name, "seconds": round(seconds, 6),
+               "commands": counters["commands"], "requests": counters["requests"],
+               "thread": threading.current_thread().name, "error": repr(error) if error else None, **labels})
+
+
+def instrument(driver):
+    """
+    Count every command the driver sends to its WebDriver process.
+    """
+    execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        count("commands")
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return driver
+
+
+def _write_prometheus(path, totals, run_seconds):
+    lines = []
+    # Gauges: the file describes the last run, not a count that keeps growing
+    for metric, help_text, key in (
+            ("dnc_phase_seconds", "Seconds spent in each phase in the last run", "seconds"),
+            ("dnc_phase_max_seconds", "Longest single run of each phase in the last run", "max"),
+            ("dnc_phase_calls", "Times each phase ran in the last run", "calls"),
+            ("dnc_phase_errors", "Times each phase failed in the last run", "errors"),
+            ("dnc_webdriver_commands", "WebDriver commands sent in each phase in the last run", "commands"),
+            ("dnc_http_requests", "HTTP requests sent in each phase in the last run", "requests")):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(f'{metric}{{phase="{name}"}} {round(stats[key], 6)}' for name, stats in sorted(totals.items()))
+    lines.append("# HELP dnc_run_seconds Duration of the last run")
+    lines.append("# TYPE dnc_run_seconds gauge")
+    lines.append(f"dnc_run_seconds {run_seconds:.3f}")
+    lines.append("# HELP dnc_run_timestamp_seconds When the last run finished")
+    lines.append("# TYPE dnc_run_timestamp_seconds gauge")
+    lines.append(f"dnc_run_timestamp_seconds {time.time():.0f}")
+    # The textfile collector may read at any moment, so replace the file in one step
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+def finish():
+    """
+    Write the summary lines and Prometheus file, then print the phase table.
+    """
+    run_seconds = time.time() - _started
+    with _lock:
+        if not _totals:
+            return
+        totals = {name: dict(stats) for name, stats in _totals.items()}
+    for name, stats in totals.items():
+        _emit({"run": RUN_ID, "ts": time.time(), "event": "summary", "phase": name, **stats})
+    _emit({"run": RUN_ID, "ts": time.time(), "event": "run", "seconds": round(run_seconds, 3)})
+    if _prometheus:
+        _write_prometheus(_prometheus, totals, run_seconds)
+    report(totals, run_seconds)
+
+
+def report(totals=None, run_seconds=None):
+    """
+    Print each phase's time and command counts, longest total first.
+    """
+    if totals is None:
+        with _lock:
+            totals = {name: dict(stats) for name, stats in _totals.items()}
+    if not totals:
+        return
+    print(f"\n{'Phase':<10} {'Calls':>6} {'Total s':>8} {'Max s':>7} {'Commands':>9} {'Requests':>9}")
+    for name, stats in sorted(totals.items(), key=lambda item: item[1]["seconds"], reverse=True):
+        print(f"{name:<10} {stats['calls']:>6} {stats['seconds']:>8.2f} {stats['max']:>7.2f} {stats['commands']:>9} {stats['requests']:>9}")
+    if run_seconds is not None:
+        print(f"Run took {run_seconds:.1f}s")
@@ -0,0 +1,168 @@
+"""
+Moving contacts to another folder in chunks, checking every chunk actually moved.
+
+The engine does not know how a move is made or checked; it is given two callables:
+  move_chunk(contacts, attempt) moves the contacts (attempt > 0 on retries), and
+  remaining(contacts) returns the ones that are still in the source folder.
+A chunk that does not fully move is retried with exponential backoff; whatever is
+still left after the last retry is reported in MoveReport.failed, never dropped.
+An optional committed(contacts) callable is told which contacts of each chunk moved
+as soon as that chunk is finished.
+
+move_folder walks a folder a page at a time with an engine, for both the browser and
+the HTTP client, which only supply how a page is read and how a chunk is moved.
+"""
+import time
+from collections import namedtuple
+
+from . import pagination
+
+MoveReport = namedtuple("MoveReport", "moved failed seconds")
+
+
+class MoveEngine:
+    def __init__(self, move_chunk, remaining, chunk_size=100, retries=3, backoff=1.0, committed=None):
+        self.move_chunk = move_chunk
+        self.remaining = remaining
+        self.committed = committed
+        self.chunk_size = max(1, chunk_size)
+        self.retries = retries
+        self.backoff = backoff
+
+    def commit(self, contacts):
+        """
+        Move contacts chunk by chunk. Returns a MoveReport.
+        """
+        start = time.perf_counter()
+        moved = 0
+        failed = []
+        for i in range(0, len(contacts), self.chunk_size):
+            chunk = pending = contacts[i:i + self.chunk_size]
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    print(f"Retrying {len(pending)} unmoved contacts in {delay:.1f}s (attempt {attempt + 1} of {self.retries + 1})...")
+                    time.sleep(delay)
+                try:
+                    self.move_chunk(pending, attempt)
+                    left = self.remaining(pending)
+                except Exception as e:
+                    # Retry the whole chunk; contacts that did move are skipped by the
+                    # next attempt's selection or are harmless to move twice
+                    print(f"WARNING: Moving {len(pending)} contacts failed: {e}")
+                    left = pending
+                moved += len(pending) - len(left)
+                pending = left
+                if not pending:
+                    break
+            failed.extend(pending)
+            if self.committed:
+                left_ids = {contact['id'] for contact in pending}
+                self.committed([contact for contact in chunk if contact['id'] not in left_ids])
+        return MoveReport(moved, failed, time.perf_counter() - start)
+
+
+def merge_reports(reports):
+    reports = list(reports)
+    return MoveReport(sum(r.moved for r in reports), [c for r in reports for c in r.failed], sum(r.seconds for r in reports))
+
+
+def move_folder(fetch_page, engine, folder_id, echo=False, index=None, sink=None, journal=None, export=None,
+                registry=None):
+    """
+    Read a folder one page at a time and move each page's contacts with engine before
+    reading on, so only one page of contacts is held however big the folder is.
+    fetch_page(page) returns the contacts on a page of the folder, counted from 1.
+    Moving empties the page, so the next contacts are read from the first page again.
+    Contacts that could not be moved, or that the state index says an earlier run
+    already moved, stay in the folder and are skipped on later pages; once every
+    contact on a page is one that stays, reading goes on from the page after it. A
+    page that comes back unchanged after its contacts were moved raises
+    pagination.PageStuckError. Without an engine nothing moves, and the pages are
+    read in turn, each next one while the current one is handled.
+    registry, if given, is a DNC registry index: only contacts whose phone number is
+    on it are moved and mailed, the rest stay in the folder.
+    sink, if given, is called with each page's contacts as soon as the page is read.
+    journal, if given, records every page read and the finished folder.
+    export, if given, records what was done to each contact once its page is handled.
+    Returns the number of contacts and the set of emails found.
+    """
+    # Pages at the top of the folder that only hold contacts staying in it
+    passed = 0
+
+    def fetch(page):
+        return fetch_page(page + passed)
+
+    if engine:
+        pages = pagination.iter_pages(fetch, consume=True, position=lambda: passed)
+    else:
+        pages = pagination.iter_pages(fetch, prefetch=True)
+
+    emails = set()  # No duplicates
+    total = 0
+    not_listed = 0
+    skipped_ids = set()
+    reports = []
+    for page_rows in pages:
+        rows = [row for row in page_rows if row['id'] not in skipped_ids]
+        if registry:
+            rows, unlisted = registry.split(rows)
+            skipped_ids.update(row['id'] for row in unlisted)
+            not_listed += len(unlisted)
+            if export:
+                export.contacts(folder_id, unlisted, "not_listed")
+        for row in rows:
+            for email in row['emails']:
+                if echo:
+                    print(email)
+                emails.add(email)
+        if rows:
+            if journal:
+                journal.extracted(folder_id, rows)
+            if sink:
+                sink(rows)
+            total += len(rows)
+
+        if index and rows:
+            index.seen(rows, folder_id)
+            already_moved = index.moved_ids(row['id'] for row in rows)
+            if already_moved:
+                print(f"Skipping {len(already_moved)} contacts an earlier run already moved")
+                skipped_ids.update(already_moved)
+                if export:
+                    export.contacts(folder_id, [row for row in rows if row['id'] in already_moved], "already_moved")
+                rows = [row for row in rows if row['id'] not in already_moved]
+
+        if engine is None:
+            if export:
+                export.contacts(folder_id, rows, "not_moved")
+            continue
+        if rows:
+            report = engine.commit(rows)
+            failed_ids = {contact['id'] for contact in report.failed}
+            skipped_ids.update(failed_ids)
+            if export:
+                export.contacts(folder_id, [row for row in rows if row['id'] not in failed_ids], "moved")
+                export.contacts(folder_id, report.failed, "move_failed")
+            if index:
+                index.mark_moved(row['id'] for row in rows if row['id'] not in failed_ids)
+            reports.append(report)
+        if all(row['id'] in skipped_ids for row in page_rows):
+            # Nothing on this page will leave it, so the next contacts are on the page after
+            passed += 1
+    if engine:
+        print_report(merge_reports(reports))
+    if not_listed:
+        print(f"Left {not_listed} contacts that are not on the DNC registry in the folder")
+    if journal:
+        journal.folder_done(folder_id)
+    return total, emails
+
+
+def print_report(report, label="DNC"):
+    rate = report.moved / report.seconds if report.seconds else 0.0
+    print(f"Moved {report.moved} contacts to {label} in {report.seconds:.1f}s ({rate:.1f} contacts/s)")
+    if report.failed:
+        print(f"WARNING: {len(report.failed)} contacts could not be moved to {label} and are still in their folder:")
+        for contact in report.failed:
+            print(f"  {contact['id']} {', '.join(contact.get('emails', []))}")
@@ -0,0 +1,71 @@
+"""
+Walking every page of a contact folder.
+
+fetch_page(page) returns the contacts on one page (1-based) of a folder. Pages are
+yielded as they are read, so only the current page (and the prefetched next one) is
+ever held in memory.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PageStuckError(RuntimeError):
+    """
+    With consume, a page came back unchanged although its contacts were handled, so
+    the rest of the folder cannot be reached.
+    """
+
+
+def _ids(contacts):
+    return {contact['id'] for contact in contacts}
+
+
+def iter_pages(fetch_page, consume=False, prefetch=False, position=None):
+    """
+    Yield the contacts of a folder one page at a time until an empty page comes back.
+
+    consume: the caller moves every yielded contact out of the folder before asking for
+             the next page, so the remaining contacts keep shifting onto page 1 and
+             page 1 is read again each time.
+    position: with consume, returns how many pages at the top of the folder the caller
+              has passed because every contact on them stays in the folder; fetch_page
+              reads from the page after those.
+    prefetch: read the next page on a background thread while the caller works on the
+              current one. Only valid without consume, and only if fetch_page can run
+              on another thread (HTTP clients can, a WebDriver cannot).
+
+    Stops if a page comes back identical to the previous one read from another
+    position, which happens when the server clamps an out-of-range page number. With
+    consume, a page that comes back identical from the same position means its
+    contacts did not leave the folder and the caller did not pass it either, so the
+    rest of the folder cannot be read: that raises PageStuckError rather than
+    quietly ending the folder.
+    """
+    if consume and prefetch:
+        raise ValueError("prefetch cannot be used with consume, the next page depends on the current one")
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = 1
+        pending = executor.submit(fetch_page, page) if executor else None
+        previous = None
+        while True:
+            at = position() if consume and position else page
+            contacts = pending.result() if executor else fetch_page(page)
+            if not contacts:
+                return
+            ids = _ids(contacts)
+            if previous and ids == previous[1]:
+                if consume and at == previous[0]:
+                    raise PageStuckError(f"{len(contacts)} contacts are still in the folder after being processed, "
+                                         f"so the rest of the folder could not be read")
+                return
+            previous = (at, ids)
+
+            if not consume:
+                page += 1
+            if executor:
+                pending = executor.submit(fetch_page, page)
+            yield contacts
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
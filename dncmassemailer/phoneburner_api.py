@@ -0,0 +1,385 @@
+"""
+Plain HTTP client for the PhoneBurner contact manager.
+
+Logs in once through the same form the browser uses, keeps the session cookies in a
+pooled requests.Session and reads folders and contact grids straight from the HTML/JSON
+the contact manager serves, so no browser is needed.
+"""
+import json
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from . import metrics
+from . import mover
+from . import rate_control
+
+BASE_URL = "https://www.phoneburner.com"
+
+# Contact manager endpoints, relative to BASE_URL. Adjust here if PhoneBurner moves
+# them; the replay server in benchmarks/ serves whatever paths were recorded.
+LOGIN_PATH = "/homepage/login"
+FOLDERS_PATH = "/cm/index"
+GRID_PATH = "/cm/grid"
+MOVE_PATH = "/cm/move"
+
+# Answers that mean PhoneBurner is throttling or overloaded: the request is retried
+# after a back-off (the server's Retry-After if it sent one)
+THROTTLED_STATUSES = {429, 502, 503, 504}
+THROTTLE_RETRIES = 5
+
+# Response headers --record keeps, for the replay server to send back
+RECORDED_HEADERS = ("Location", "Set-Cookie", "Retry-After")
+
+# Contact fields read from the grid for mail-merge templates, by the class of the cell
+# (in the first row of a contact's pair) that holds them. Adjust here to match the
+# columns the contact manager shows.
+CONTACT_FIELDS = {
+    "name": "contact-name",
+    "company": "contact-company",
+    "renewal_date": "contact-renewal-date",
+    "phone": "contact-phone",
+}
+
+
+class PhoneBurnerError(Exception):
+    pass
+
+
+class LoginFormParser(HTMLParser):
+    """
+    Collects the login form's action and every input's name/value, remembering which
+    names belong to the f_username and f_password fields.
+    """
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.fields = {}
+        self.username_name = None
+        self.password_name = None
+        self._in_form = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and self.action is None:
+            self._in_form = True
+            self.action = attrs.get("action") or ""
+        elif tag == "input" and self._in_form and attrs.get("name"):
+            self.fields[attrs["name"]] = attrs.get("value") or ""
+            if attrs.get("id") == "f_username":
+                self.username_name = attrs["name"]
+            elif attrs.get("id") == "f_password":
+                self.password_name = attrs["name"]
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._in_form = False
+
+
+class FolderNavParser(HTMLParser):
+    """
+    Collects (name, id, count) for every contacts-folder-nav-item in the sidebar.
+    count is None when the item does not show a contacts-folder-nav-count.
+    """
+    def __init__(self):
+        super().__init__()
+        self.folders = []
+        self._item_depth = 0
+        self._item_id = None
+        self._in = None
+        self._name = []
+        self._count = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if self._item_depth:
+            self._item_depth += 1
+            if "contacts-folder-nav-name" in classes:
+                self._in = self._name
+            elif "contacts-folder-nav-count" in classes:
+                self._in = self._count
+        elif "contacts-folder-nav-item" in classes:
+            self._item_depth = 1
+            self._item_id = attrs.get("id")
+            self._name = []
+            self._count = []
+
+    def handle_endtag(self, tag):
+        if not self._item_depth:
+            return
+        self._item_depth -= 1
+        self._in = None
+        if not self._item_depth:
+            digits = re.sub(r"[^0-9]", "", "".join(self._count))
+            self.folders.append(("".join(self._name).strip(), self._item_id, int(digits) if digits else None))
+
+    def handle_data(self, data):
+        if self._in is not None:
+            self._in.append(data)
+
+
+# Elements without an end tag, which must not count towards a field cell's nesting
+VOID_TAGS = {"area", "br", "col", "hr", "img", "input", "link", "meta", "wbr"}
+
+
+class ContactGridParser(HTMLParser):
+    """
+    Collects contacts from main_contact_grid markup with the same rules as
+    contact_grid.EXTRACT_ROWS_JS: every other tr.contact-new row, its mailto links,
+    its contact ID, its checkbox state and the text of its CONTACT_FIELDS cells.
+    """
+    def __init__(self):
+        super().__init__()
+        self.contacts = []
+        self._row_index = -1
+        self._current = None
+        self._field_classes = {css_class: name for name, css_class in CONTACT_FIELDS.items()}
+        self._field = None  # [name, open elements, text] of the field cell being read
+        self._row_ids = {}  # row index -> the tr's id, the last resort for the contact ID
+        self._boxed = set()  # row indexes whose first checkbox has been seen
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "tr":
+            if "contact-new" not in (attrs.get("class") or "").split():
+                return
+            self._row_index += 1
+            self._current = None
+            self._field = None
+            if self._row_index % 2 == 0:
+                self._row_ids[self._row_index] = attrs.get("id")
+                self._current = {
+                    'index': self._row_index,
+                    'id': attrs.get("data-contact-id"),
+                    'emails': [],
+                    'checked': False,
+                    'fields': {},
+                }
+                self.contacts.append(self._current)
+            return
+        if self._current is None:
+            return
+        if self._field:
+            self._field[1] += tag not in VOID_TAGS
+        else:
+            name = next((self._field_classes[c] for c in (attrs.get("class") or "").split() if c in self._field_classes), None)
+            if name:
+                self._field = [name, 1, []]
+        if tag == "a":
+            href = attrs.get("href")
+            if href and href.startswith("mailto:"):
+                self._current['emails'].append(href[len("mailto:"):])
+        elif tag == "input" and attrs.get("type") == "checkbox" and self._current['index'] not in self._boxed:
+            # Only the row's first checkbox counts, as with querySelector
+            self._boxed.add(self._current['index'])
+            if not self._current['id']:
+                self._current['id'] = attrs.get("value")
+            self._current['checked'] = "checked" in attrs
+
+    def handle_endtag(self, tag):
+        if self._field and tag not in VOID_TAGS:
+            self._field[1] -= 1
+            if not self._field[1]:
+                name, _, text = self._field
+                self._current['fields'][name] = " ".join("".join(text).split())
+                self._field = None
+
+    def handle_data(self, data):
+        if self._field:
+            self._field[2].append(data)
+
+    def close(self):
+        super().close()
+        # CONTACT_ID_JS order: data-contact-id, checkbox value, row id, position
+        for contact in self.contacts:
+            if not contact['id']:
+                contact['id'] = self._row_ids.get(contact['index']) or f"row-{contact['index']}"
+
+
+def parse_folders(html):
+    parser = FolderNavParser()
+    parser.feed(html)
+    parser.close()
+    return parser.folders
+
+
+def parse_contacts(html):
+    parser = ContactGridParser()
+    parser.feed(html)
+    parser.close()
+    return parser.contacts
+
+
+def folder_view_id(folder_id):
+    """
+    The numeric view ID the contact manager uses in its URLs, taken from a sidebar
+    element ID such as "folder_2766255".
+    """
+    match = re.search(r"(\d+)", folder_id or "")
+    if not match:
+        raise PhoneBurnerError(f"Folder ID {folder_id!r} has no numeric view ID")
+    return match.group(1)
+
+
+class PhoneBurnerClient:
+    def __init__(self, base_url=BASE_URL, pool_size=10, timeout=30, record_dir=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.record_dir = record_dir
+        # Imported here so the command line can read BASE_URL without loading requests
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) dncmassemailer"
+        self.limiter = rate_control.limiter("phoneburner")
+
+    def _request(self, method, path, **kwargs):
+        """
+        Send a request to a path under base_url, or to a full URL.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        url = path if "://" in path else self.base_url + path
+        for attempt in range(THROTTLE_RETRIES + 1):
+            with self.limiter.slot() as slot:
+                metrics.count("requests")
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code in THROTTLED_STATUSES:
+                    slot.throttled(rate_control.retry_after(response.headers) or min(2 ** attempt, 30))
+            if response.status_code not in THROTTLED_STATUSES:
+                break
+        if self.record_dir:
+            # Redirects the session followed (the login's 302) are recorded too
+            for hop in response.history + [response]:
+                self._record(hop)
+        response.raise_for_status()
+        return response
+
+    def _record(self, response):
+        """
+        Save a response in the format benchmarks/replay_server.py serves.
+        """
+        method = response.request.method
+        url = urlsplit(response.request.url)
+        path = url.path[len(urlsplit(self.base_url).path):] or "/"
+        recording = {
+            "method": method,
+            "path": path,
+            "query": url.query,
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "text/html"),
+            "body": response.text,
+        }
+        # Several Set-Cookie headers are folded into one by requests, so read them
+        # from the raw response where there is one
+        raw = getattr(getattr(response, "raw", None), "headers", None)
+        headers = {}
+        for name in RECORDED_HEADERS:
+            values = raw.getlist(name) if hasattr(raw, "getlist") else [response.headers[name]] if name in response.headers else []
+            if values:
+                headers[name] = values[0] if len(values) == 1 else values
+        if headers:
+            recording["headers"] = headers
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"{len(os.listdir(self.record_dir)):04d}_{method}_{re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_')}.json"
+        with open(os.path.join(self.record_dir, name), "w", encoding="utf-8") as f:
+            json.dump(recording, f, indent=2)
+
+    def login(self, username, password):
+        page = self._request("GET", LOGIN_PATH)
+        form = LoginFormParser()
+        form.feed(page.text)
+        if not (form.username_name and form.password_name):
+            raise PhoneBurnerError("Login form not found on the login page")
+
+        data = dict(form.fields)
+        data[form.username_name] = username
+        data[form.password_name] = password
+        action = urljoin(page.url, form.action or LOGIN_PATH)
+        response = self._request("POST", action, data=data)
+        if 'id="f_password"' in response.text:
+            raise PhoneBurnerError("Login failed, check your email and password")
+
+    def load_cookies(self, cookies):
+        """
+        Use saved (Selenium-style) session cookies instead of logging in.
+        """
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+
+    def is_logged_in(self):
+        import requests
+        try:
+            response = self._request("GET", FOLDERS_PATH)
+        except requests.HTTPError:
+            return False
+        return "/login" not in response.url and 'id="f_password"' not in response.text
+
+    def cookies(self):
+        """
+        The session cookies as Selenium-style dicts, for handing the login to a browser.
+        """
+        return [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "secure": c.secure}
+            for c in self.session.cookies
+        ]
+
+    def list_folders(self):
+        return parse_folders(self._request("GET", FOLDERS_PATH).text)
+
+    def fetch_contacts(self, folder_id, page=1):
+        """
+        Contacts on one page of a folder's grid. The grid endpoint answers with either
+        the grid markup or JSON wrapping it under "html".
+        """
+        response = self._request("GET", GRID_PATH, params={"view_id": folder_view_id(folder_id), "page": page})
+        if "json" in response.headers.get("Content-Type", ""):
+            return parse_contacts(response.json().get("html", ""))
+        return parse_contacts(response.text)
+
+    def move_contacts(self, contact_ids, target_folder_id):
+        """
+        Move contacts to another folder with one bulk request.
+        """
+        response = self._request("POST", MOVE_PATH, data={"folder_id": folder_view_id(target_folder_id), "contact_ids[]": list(contact_ids)})
+        if "json" in response.headers.get("Content-Type", "") and response.json().get("success") is False:
+            raise PhoneBurnerError(f"Move rejected: {response.json().get('message', response.text)}")
+
+
+def process_folder(client, folder_id, dnc_folder_id, echo=False, chunk_size=100, retries=3, index=None, sink=None,
+                   journal=None, export=None, registry=None):
+    """
+    Read a folder one page at a time and move each page's contacts to the DNC folder
+    (if dnc_folder_id is given) over HTTP; mover.move_folder walks the folder and
+    handles the options. Each chunk is one bulk request, checked by reading its page
+    again: contacts still on it are moved again, and reported if they still will not
+    move. Returns the number of contacts and the set of emails found.
+    """
+    # The last page read, which the chunk being moved came from
+    last_page = 1
+
+    def fetch_page(page):
+        nonlocal last_page
+        last_page = page
+        with metrics.phase("extract"):
+            return client.fetch_contacts(folder_id, page)
+
+    def move_chunk(chunk, attempt):
+        with metrics.phase("move"):
+            client.move_contacts([contact['id'] for contact in chunk], dnc_folder_id)
+
+    def remaining(chunk):
+        with metrics.phase("move"):
+            present = {row['id'] for row in client.fetch_contacts(folder_id, last_page)}
+        return [contact for contact in chunk if contact['id'] in present]
+
+    engine = None
+    if dnc_folder_id:
+        committed = (lambda moved: journal.moved(folder_id, [contact['id'] for contact in moved])) if journal else None
+        engine = mover.MoveEngine(move_chunk, remaining, chunk_size, retries, committed=committed)
+    return mover.move_folder(fetch_page, engine, folder_id, echo=echo, index=index, sink=sink, journal=journal,
+                             export=export, registry=registry)
@@ -0,0 +1,71 @@
+"""
+Running the stages of a run side by side instead of one after another.
+
+A Stage is a thread with a bounded inbox. Producers put() work into it and block while
+the inbox is full, so a slow stage holds back the ones feeding it instead of letting
+work pile up in memory. Whatever handle() returns is put() into the next stage, so
+stages chain into a pipeline whose total time approaches that of its slowest stage.
+"""
+import queue
+import threading
+
+_DONE = object()
+
+
+class Stage:
+    """
+        mail = Stage("mail", send_batch)
+        scrape = Stage("scrape", read_page, downstream=mail)
+        for page in pages:
+            scrape.put(page)
+        scrape.close()  # also closes mail once scrape has drained
+
+    handle(item) returns an item for the downstream stage, or None for nothing. A
+    failing handle stops the stage; later items are drained and dropped so producers
+    never block on it, and close() raises the error.
+    """
+    def __init__(self, name, handle, maxsize=8, downstream=None, on_close=None):
+        self.name = name
+        self.handle = handle
+        self.downstream = downstream
+        self.on_close = on_close
+        self.error = None
+        self._inbox = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, name=f"stage-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        self._inbox.put(item)
+
+    def _run(self):
+        while True:
+            item = self._inbox.get()
+            if item is _DONE:
+                break
+            if self.error:
+                continue
+            try:
+                result = self.handle(item)
+                if result is not None and self.downstream:
+                    self.downstream.put(result)
+            except Exception as e:
+                self.error = e
+                print(f"WARNING: The {self.name} stage failed: {e}")
+        if self.on_close and not self.error:
+            try:
+                result = self.on_close()
+                if result is not None and self.downstream:
+                    self.downstream.put(result)
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        """
+        Wait for everything already put() to be handled, then close the downstream stage.
+        """
+        self._inbox.put(_DONE)
+        self._thread.join()
+        if self.downstream:
+            self.downstream.close()
+        if self.error:
+            raise self.error
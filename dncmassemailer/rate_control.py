@@ -0,0 +1,143 @@
+"""
+Finding the fastest pace a server tolerates, and backing off when it pushes back.
+
+Each server gets one AdaptiveLimiter ("phoneburner" for page loads, grid reads and
+moves, "smtp" for mail), shared by every worker and stage that talks to it. A
+request takes a slot with `with limiter.slot() as slot:` and marks it
+slot.throttled() on a 429/5xx or a transient SMTP error, or slot.failed() on
+another error. The limiter adjusts how many requests may be in flight at once,
+AIMD style:
+  additive increase        +1 slot for every window of fast, successful requests
+                           sent while the limit was full
+  multiplicative decrease  halve the slots on a throttled, failed or slow request,
+                           at most once per window so one burst of errors does not
+                           collapse the limit to 1
+A Retry-After from the server also pauses every new request until it has passed.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Defaults for every limiter. Change with configure() / --max-inflight, --slow-response.
+MAX_IN_FLIGHT = 16
+SLOW_RESPONSE = 5.0  # seconds; slower responses count as the server struggling
+
+
+class _Slot:
+    def __init__(self):
+        self.outcome = "ok"
+        self.retry_after = None
+
+    def throttled(self, retry_after=None):
+        self.outcome = "throttled"
+        self.retry_after = retry_after
+
+    def failed(self):
+        self.outcome = "failed"
+
+
+class AdaptiveLimiter:
+    def __init__(self, name, initial=2, minimum=1, maximum=None, slow=None, decrease=0.5):
+        self.name = name
+        self.maximum = maximum or MAX_IN_FLIGHT
+        self.minimum = minimum
+        self.limit = float(max(minimum, min(initial, self.maximum)))
+        self.slow = slow or SLOW_RESPONSE
+        self.decrease = decrease
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.stats = {"ok": 0, "slow": 0, "throttled": 0, "failed": 0, "decreases": 0, "seconds": 0.0}
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._since_decrease = 0
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        slot = _Slot()
+        start = time.perf_counter()
+        try:
+            yield slot
+        except Exception:
+            if slot.outcome == "ok":
+                slot.failed()
+            raise
+        finally:
+            self.release(time.perf_counter() - start, slot.outcome, slot.retry_after)
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, seconds, outcome="ok", retry_after=None):
+        with self._cond:
+            self.in_flight -= 1
+            self.stats["seconds"] += seconds
+            if outcome == "ok" and seconds > self.slow:
+                outcome = "slow"
+            self.stats[outcome] += 1
+            self._since_decrease += 1
+            if outcome == "ok":
+                # +1/limit per success is +1 per window. A limit that was not full says
+                # nothing about whether a higher one is safe, so it does not grow.
+                if self.in_flight + 1 >= int(self.limit):
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                    self.peak_limit = max(self.peak_limit, self.limit)
+            elif self._since_decrease >= int(self.limit):
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.stats["decreases"] += 1
+                self._since_decrease = 0
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def report(self):
+        stats = self.stats
+        total = stats["ok"] + stats["slow"] + stats["throttled"] + stats["failed"]
+        if total:
+            print(f"{self.name}: {total} requests ({stats['throttled']} throttled, {stats['failed']} failed, {stats['slow']} slow), "
+                  f"in-flight limit {self.limit:.1f} (peak {self.peak_limit:.1f}, {stats['decreases']} back-offs)")
+
+
+_lock = threading.Lock()
+_limiters = {}
+
+
+def configure(max_in_flight=None, slow_response=None):
+    global MAX_IN_FLIGHT, SLOW_RESPONSE
+    if max_in_flight:
+        MAX_IN_FLIGHT = max_in_flight
+    if slow_response:
+        SLOW_RESPONSE = slow_response
+
+
+def limiter(name):
+    """
+    The shared limiter for a server, created on first use.
+    """
+    with _lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveLimiter(name)
+        return _limiters[name]
+
+
+def retry_after(headers):
+    """
+    Seconds from a Retry-After header, or None. HTTP dates are not used by PhoneBurner.
+    """
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+def report():
+    with _lock:
+        limiters = list(_limiters.values())
+    for item in limiters:
+        item.report()
@@ -0,0 +1,118 @@
+"""
+Keeping a PhoneBurner login between runs.
+
+The session file holds the username and the session cookies, encrypted with the
+Windows user's DPAPI key on Windows. Elsewhere it is encrypted with a Fernet key
+(pip install cryptography) stored next to the file, readable only by its owner:
+anyone who can read the session file can read the key too, so this only keeps the
+cookies out of plain sight and is not encryption at rest. A run that finds a
+still-valid session in it skips the login form entirely.
+"""
+import json
+import os
+import sys
+import time
+
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".dncmassemailer")
+SESSION_FILE = os.path.join(STATE_DIR, "session.bin")
+
+
+class SessionError(Exception):
+    pass
+
+
+def default_session_file(profile_dir=None):
+    return os.path.join(profile_dir, "dnc_session.bin") if profile_dir else SESSION_FILE
+
+
+def _dpapi(data, protect):
+    import ctypes
+    from ctypes import wintypes
+
+    class Blob(ctypes.Structure):
+        _fields_ = [("cbData", wintypes.DWORD), ("pbData", ctypes.POINTER(ctypes.c_char))]
+
+    buffer = ctypes.create_string_buffer(data, len(data))
+    blob_in = Blob(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+    blob_out = Blob()
+    crypt = ctypes.windll.crypt32.CryptProtectData if protect else ctypes.windll.crypt32.CryptUnprotectData
+    if not crypt(ctypes.byref(blob_in), None, None, None, None, 0, ctypes.byref(blob_out)):
+        raise ctypes.WinError()
+    try:
+        return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+    finally:
+        ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+
+
+def _cryptography():
+    try:
+        import cryptography.fernet
+    except ImportError:
+        return None
+    return cryptography
+
+
+def check():
+    """
+    Raise SessionError if sessions cannot be saved on this system, before a run starts.
+    """
+    if sys.platform != "win32" and _cryptography() is None:
+        raise SessionError("Remembering the login needs the cryptography package, run: pip install cryptography")
+
+
+def _fernet(path):
+    check()
+    from cryptography.fernet import Fernet
+
+    key_path = path + ".key"
+    if not os.path.exists(key_path):
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(Fernet.generate_key())
+    with open(key_path, "rb") as f:
+        return Fernet(f.read())
+
+
+def _encrypt(data, path):
+    if sys.platform == "win32":
+        return _dpapi(data, protect=True)
+    return _fernet(path).encrypt(data)
+
+
+def _decrypt(data, path):
+    if sys.platform == "win32":
+        return _dpapi(data, protect=False)
+    return _fernet(path).decrypt(data)
+
+
+def save(path, username, cookies):
+    """
+    Encrypt and write the username and session cookies to path.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = json.dumps({"username": username, "cookies": cookies, "saved": time.time()}).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_encrypt(data, path))
+    if sys.platform != "win32":
+        os.chmod(path, 0o600)
+
+
+def load(path):
+    """
+    Read a saved session. Returns (username, cookies) with expired cookies dropped, or
+    None if there is no usable session.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            saved = json.loads(_decrypt(f.read(), path))
+    except Exception as e:
+        print(f"Saved session could not be read, logging in again: {e}")
+        return None
+
+    now = time.time()
+    cookies = [cookie for cookie in saved["cookies"] if not cookie.get("expiry") or cookie["expiry"] > now]
+    if not cookies:
+        return None
+    return saved["username"], cookies
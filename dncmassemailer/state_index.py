@@ -0,0 +1,122 @@
+"""
+Local record of every contact a run has handled, so later runs only do new work.
+
+One SQLite file holds, per PhoneBurner account:
+  contacts: contact ID, folder, when it was first/last seen, flagged DNC and moved
+  emails:   address, the contact it came from, when it was first seen and emailed
+A run skips moving contacts already recorded as moved and drafting to addresses
+already recorded as emailed.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from . import email_stage
+from . import session
+
+INDEX_FILE = os.path.join(session.STATE_DIR, "state.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    account TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    folder TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    dnc_flagged REAL,
+    moved REAL,
+    PRIMARY KEY (account, contact_id)
+);
+CREATE TABLE IF NOT EXISTS emails (
+    account TEXT NOT NULL,
+    email TEXT NOT NULL,
+    contact_id TEXT,
+    first_seen REAL NOT NULL,
+    emailed REAL,
+    PRIMARY KEY (account, email)
+);
+"""
+
+# SQLite limits the number of ? parameters in one statement
+BATCH = 500
+
+
+class StateIndex:
+    def __init__(self, account, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.account = account.lower()
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _select(self, sql, values):
+        """
+        Run a "... IN (?)" query over values in batches and return the first column.
+        """
+        values = list(values)
+        found = set()
+        for i in range(0, len(values), BATCH):
+            batch = values[i:i + BATCH]
+            query = sql.format(",".join("?" * len(batch)))
+            found.update(row[0] for row in self._db.execute(query, [self.account, *batch]))
+        return found
+
+    def seen(self, contacts, folder):
+        """
+        Record contacts found in a DNC folder.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO contacts (account, contact_id, folder, first_seen, last_seen, dnc_flagged) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (account, contact_id) DO UPDATE SET folder = excluded.folder, last_seen = excluded.last_seen, "
+                "dnc_flagged = COALESCE(contacts.dnc_flagged, excluded.dnc_flagged)",
+                [(self.account, contact['id'], folder, now, now, now) for contact in contacts])
+            self._db.executemany(
+                "INSERT OR IGNORE INTO emails (account, email, contact_id, first_seen) VALUES (?, ?, ?, ?)",
+                [(self.account, email, contact['id'], now) for contact in contacts for email in email_stage.clean(contact['emails'])])
+
+    def moved_ids(self, contact_ids):
+        """
+        The given contact IDs that an earlier run already moved.
+        """
+        with self._lock:
+            return self._select("SELECT contact_id FROM contacts WHERE account = ? AND moved IS NOT NULL AND contact_id IN ({})", contact_ids)
+
+    def mark_moved(self, contact_ids):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany("UPDATE contacts SET moved = ? WHERE account = ? AND contact_id = ?",
+                                 [(now, self.account, contact_id) for contact_id in contact_ids])
+
+    def unmailed(self, emails):
+        """
+        The given addresses that have not been emailed yet.
+        """
+        emails = set(emails)
+        with self._lock:
+            mailed = self._select("SELECT email FROM emails WHERE account = ? AND emailed IS NOT NULL AND email IN ({})", emails)
+        return emails - mailed
+
+    def mark_emailed(self, emails):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO emails (account, email, first_seen, emailed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (account, email) DO UPDATE SET emailed = excluded.emailed",
+                [(self.account, email, now, now) for email in emails])
+
+    def stats(self):
+        with self._lock:
+            contacts = self._db.execute(
+                "SELECT COUNT(*), COUNT(moved), MAX(last_seen) FROM contacts WHERE account = ?", (self.account,)).fetchone()
+            emails = self._db.execute(
+                "SELECT COUNT(*), COUNT(emailed) FROM emails WHERE account = ?", (self.account,)).fetchone()
+        return {"contacts": contacts[0], "moved": contacts[1], "last_seen": contacts[2], "emails": emails[0], "emailed": emails[1]}
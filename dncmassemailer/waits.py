@@ -0,0 +1,98 @@
+"""
+Explicit, condition-based waits with one central table of timeouts.
+
+Every wait goes through wait_for, which records how long the step actually waited so
+report() can show where a run's time went.
+"""
+import threading
+import time
+
+# Longest each step may wait, in seconds. Change with configure() / --timeouts.
+TIMEOUTS = {
+    "login": 30,           # login form submitted -> left the login page
+    "grid": 30,            # folder page opened -> grid rows replaced and no request in flight
+    "checkbox": 15,        # per-row extraction: row checkbox clickable
+    "move_dropdown": 10,   # move button clicked -> DNC option clickable
+    "confirm_modal": 45,   # DNC option clicked -> confirmation modal shown
+    "confirm_input": 5,    # confirmation modal -> input box / Okay button ready
+    "move_done": 30,       # move submitted -> modal closed and no request in flight
+}
+
+# Pause between opening mailto drafts. There is no event to wait on once a draft is
+# handed to the mail client, so this stays a fixed (configurable) gap.
+DRAFT_INTERVAL = 1.0
+
+# True when the page has finished loading, no jQuery request is in flight, no
+# loading spinner and no modal is showing.
+PAGE_IDLE_JS = """
+if (document.readyState !== 'complete') { return false; }
+if (window.jQuery && window.jQuery.active) { return false; }
+var busy = document.querySelectorAll('.spinner, .loading, .modal.show, .modal.in');
+for (var i = 0; i < busy.length; i++) {
+    if (busy[i].getClientRects().length) { return false; }
+}
+return true;
+"""
+
+_lock = threading.Lock()
+_waited = {}  # step -> [waits, total seconds, longest wait, timeouts]
+
+
+def configure(overrides):
+    """
+    Apply "step=seconds" overrides, e.g. ["grid=60", "confirm_modal=90"].
+    "draft_interval" sets the pause between mailto drafts.
+    """
+    global DRAFT_INTERVAL
+    for override in overrides:
+        step, _, seconds = override.partition("=")
+        step = step.strip()
+        if step == "draft_interval":
+            DRAFT_INTERVAL = float(seconds)
+        elif step in TIMEOUTS:
+            TIMEOUTS[step] = float(seconds)
+        else:
+            raise ValueError(f"Unknown wait step {step!r}, expected one of: {', '.join(TIMEOUTS)}, draft_interval")
+
+
+def record(step, seconds, timed_out=False):
+    with _lock:
+        stats = _waited.setdefault(step, [0, 0.0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        stats[3] += timed_out
+
+
+def wait_for(target, step, condition, timeout=None):
+    """
+    Wait until condition(target) is truthy, for at most the step's configured timeout.
+    target is a driver or an element. Raises TimeoutException like WebDriverWait.
+    """
+    # Selenium is only loaded once something actually waits on a browser
+    from selenium.webdriver.support.ui import WebDriverWait
+    start = time.perf_counter()
+    try:
+        result = WebDriverWait(target, timeout or TIMEOUTS[step], poll_frequency=0.1).until(condition)
+    except Exception:
+        record(step, time.perf_counter() - start, timed_out=True)
+        raise
+    record(step, time.perf_counter() - start)
+    return result
+
+
+def page_idle(driver):
+    return driver.execute_script(PAGE_IDLE_JS)
+
+
+def report():
+    """
+    Print how long each step spent waiting, longest total first.
+    """
+    with _lock:
+        waited = sorted(_waited.items(), key=lambda item: item[1][1], reverse=True)
+    if not waited:
+        return
+    print(f"\n{'Wait step':<16} {'Waits':>6} {'Total s':>8} {'Avg s':>7} {'Max s':>7} {'Timeouts':>9}")
+    for step, (count, total, longest, timeouts) in waited:
+        print(f"{step:<16} {count:>6} {total:>8.2f} {total / count:>7.2f} {longest:>7.2f} {timeouts:>9}")
@@ -0,0 +1,111 @@
+"""
+Processing several folders at once.
+
+Each worker owns one browser (or shares the HTTP client) and pulls folders off a
+shared queue until it is empty, so a slow folder never holds up the others.
+"""
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+FolderResult = namedtuple("FolderResult", "name folder_id contacts emails seconds error")
+
+
+def resolve_folders(folders, selectors, dnc_name="DNC"):
+    """
+    Pick folders out of a (name, id, count) sidebar scan.
+
+    selectors is a list of folder names (case-insensitive), sidebar IDs or numeric view
+    IDs, or ["all"] for every named folder that is not known to be empty. The DNC folder
+    itself is never picked for "all". Raises ValueError naming every selector that
+    matches no folder.
+    """
+    named = [folder for folder in folders if folder[0]]
+    if [selector.lower() for selector in selectors] == ["all"]:
+        return [folder for folder in named if folder[0] != dnc_name and folder[2] != 0]
+
+    chosen = []
+    unknown = []
+    for selector in selectors:
+        wanted = selector.strip().lower()
+        match = next((folder for folder in named
+                      if wanted in (folder[0].lower(), (folder[1] or "").lower())
+                      or wanted == "".join(ch for ch in folder[1] or "" if ch.isdigit())), None)
+        if match is None:
+            unknown.append(selector.strip())
+        elif match not in chosen:
+            chosen.append(match)
+    if unknown:
+        raise ValueError(f"No folder named or with ID {', '.join(map(repr, unknown))}")
+    return chosen
+
+
+def run_pool(folders, start_worker, workers=None):
+    """
+    Process folders on a pool of workers and return a FolderResult per folder.
+
+    start_worker() is called once on each worker thread and returns a pair
+    (process, close): process(folder_id) returns (contacts, emails) and close() frees
+    the worker's resources. A folder that fails is reported with its error instead of
+    stopping the other workers.
+    """
+    if not folders:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(folders)))
+    jobs = queue.Queue()
+    for folder in folders:
+        jobs.put(folder)
+    results = []
+    lock = threading.Lock()
+
+    def work():
+        try:
+            process, close = start_worker()
+        except Exception as e:
+            print(f"WARNING: A worker failed to start: {e}")
+            return
+        try:
+            while True:
+                try:
+                    name, folder_id = jobs.get_nowait()[:2]
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                try:
+                    contacts, emails = process(folder_id)
+                    result = FolderResult(name, folder_id, contacts, emails, time.perf_counter() - start, None)
+                except Exception as e:
+                    result = FolderResult(name, folder_id, 0, set(), time.perf_counter() - start, e)
+                with lock:
+                    results.append(result)
+                print(f"Finished {name}: {result.contacts} contacts in {result.seconds:.1f}s")
+        finally:
+            close()
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Folders left over because every worker failed to start
+    while not jobs.empty():
+        name, folder_id = jobs.get_nowait()[:2]
+        results.append(FolderResult(name, folder_id, 0, set(), 0.0, RuntimeError("no worker could be started")))
+    return results
+
+
+def merge_results(results):
+    """
+    Print per-folder timings and return one deduplicated set of every folder's emails.
+    """
+    emails = set()
+    print(f"\n{'Folder':<30} {'Contacts':>9} {'Emails':>7} {'Seconds':>8}")
+    for result in results:
+        emails |= result.emails
+        status = f"  FAILED: {result.error}" if result.error else ""
+        print(f"{result.name[:30]:<30} {result.contacts:>9} {len(result.emails):>7} {result.seconds:>8.1f}{status}")
+    print(f"\nNumber of DNC Contacts Found = {sum(result.contacts for result in results)} ({len(emails)} unique emails)")
+    return emails